@@ -0,0 +1 @@
+# 基准测试：合成视频和OCR替身
\ No newline at end of file
@@ -0,0 +1,128 @@
+"""内存基准测试
+
+在高分辨率合成视频上分别关闭和开启帧缓冲区复用（reuse_buffers）运行提取，处理过程中
+定时记录进程的常驻内存，报告内存曲线是否平稳以及每个采样帧的平均耗时。
+
+    python -m benchmark.memory --resolution 3840x2160 --duration 20
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+
+# 将项目根目录添加到 Python 路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from benchmark.run import create_engine, peak_rss_mb
+from benchmark.synthetic import SUBTITLE_AREA, make_cues, make_video
+from src.core.options import parse_options
+
+def current_rss_mb():
+    """当前进程的常驻内存（MB），平台不支持时返回 None"""
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE') / 1024 / 1024
+    except (OSError, ValueError, AttributeError):
+        try:
+            import psutil
+        except ImportError:
+            return None
+        return psutil.Process().memory_info().rss / 1024 / 1024
+
+def run_memory_case(video_path, engine, options, interval):
+    """在独立进程中运行一次提取，每 interval 秒记录一次常驻内存"""
+    from src.core.extractor import SubtitleExtractor
+
+    options = dict(options, ocr_cache=False, checkpoint_interval=None)
+    extractor = SubtitleExtractor(ocr_engine=create_engine(engine), **options)
+    samples = []
+    done = threading.Event()
+
+    def sample():
+        while not done.is_set():
+            samples.append(current_rss_mb())
+            done.wait(interval)
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    output_path = os.path.splitext(video_path)[0] + '.memory.jsonl'
+    start = time.perf_counter()
+    try:
+        stats = extractor.extract_subtitles(video_path, output_path, 'ch', SUBTITLE_AREA)
+    finally:
+        elapsed = time.perf_counter() - start
+        done.set()
+        sampler.join()
+        extractor.close()
+
+    samples = [value for value in samples if value is not None]
+    frames = stats.get('frames_sampled', 0)
+    histograms = stats.get('metrics', {}).get('histograms', {})
+    # 后半段的内存增长：缓冲区复用后应接近 0
+    second_half = samples[len(samples) // 2:]
+    return {
+        'seconds': round(elapsed, 3),
+        'frames_sampled': frames,
+        'ms_per_frame': round(elapsed / frames * 1000, 3) if frames else None,
+        'decode_ms': round(histograms.get('decode', {}).get('mean', 0) * 1000, 3),
+        'preprocess_ms': round(histograms.get('preprocess', {}).get('mean', 0) * 1000, 3),
+        'rss_mb': {
+            'start': round(samples[0], 1) if samples else None,
+            'max': round(max(samples), 1) if samples else None,
+            'end': round(samples[-1], 1) if samples else None,
+            'second_half_growth': round(second_half[-1] - second_half[0], 1) if len(second_half) > 1 else None
+        },
+        'peak_rss_mb': peak_rss_mb(),
+        'rss_samples': [round(value, 1) for value in samples]
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="帧缓冲区复用的内存基准测试（合成视频）")
+    parser.add_argument('--resolution', default='3840x2160', help="合成视频分辨率")
+    parser.add_argument('--fps', type=float, default=25, help="帧率")
+    parser.add_argument('--duration', type=float, default=20, help="视频时长（秒）")
+    parser.add_argument('--engine', default='fake', choices=['fake', 'paddle'], help="OCR引擎")
+    parser.add_argument('--option', action='append', default=[],
+                        help="传给 SubtitleExtractor 的参数 key=value，可重复")
+    parser.add_argument('--interval', type=float, default=0.1, help="内存采样间隔（秒）")
+    parser.add_argument('--workdir', default=None, help="合成视频的保存目录，默认使用临时目录")
+    parser.add_argument('--output', default=None, help="把结果保存为JSON文件")
+    args = parser.parse_args(argv)
+
+    options = parse_options(args.option)
+    workdir = args.workdir or tempfile.mkdtemp(prefix='subtitle_benchmark_')
+    os.makedirs(workdir, exist_ok=True)
+    width, height = (int(value) for value in args.resolution.lower().split('x'))
+    video_path = os.path.join(workdir, f"synthetic_{width}x{height}_{args.fps:g}fps_{args.duration:g}s.avi")
+    if not os.path.exists(video_path):
+        print(f"生成合成视频: {video_path}")
+        make_video(video_path, make_cues(args.duration, args.fps), args.duration, width, height, args.fps)
+
+    context = multiprocessing.get_context('spawn')
+    results = {}
+    for reuse in (False, True):
+        with context.Pool(1) as pool:
+            result = pool.apply(run_memory_case, (video_path, args.engine, dict(options, reuse_buffers=reuse),
+                                                  args.interval))
+        results['reuse_buffers' if reuse else 'allocate'] = result
+        rss = result['rss_mb']
+        print(f"reuse_buffers={reuse}: {result['ms_per_frame']} 毫秒/帧 "
+              f"(解码 {result['decode_ms']} / 预处理 {result['preprocess_ms']} 毫秒), "
+              f"常驻内存 {rss['start']} -> {rss['end']} MB (最高 {rss['max']} MB, "
+              f"后半段增长 {rss['second_half_growth']} MB)")
+
+    report = {'resolution': args.resolution, 'options': options, 'engine': args.engine, 'results': results}
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"结果已保存到: {args.output}")
+    return report
+
+if __name__ == '__main__':
+    main()
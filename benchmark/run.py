@@ -0,0 +1,179 @@
+"""字幕提取基准测试
+
+生成已知字幕内容和时间轴的合成视频，端到端运行 SubtitleExtractor，报告处理速度、
+每分钟视频的OCR调用次数、峰值内存和时间轴误差。默认使用确定性的OCR替身，
+不需要 PaddleOCR 模型或网络。
+
+    python -m benchmark.run --resolutions 640x360,1280x720 --fps 25,30 --duration 60
+    python -m benchmark.run --option decoder=ffmpeg --option sampling=adaptive
+    python -m benchmark.run --profiles default,fast,color_mask
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+# 将项目根目录添加到 Python 路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from benchmark.synthetic import SUBTITLE_AREA, make_cues, make_video
+from src.core.options import parse_options
+from src.core.preprocess import GRAYSCALE_PROFILES
+
+def peak_rss_mb():
+    """当前进程的峰值内存（MB），平台不支持时返回 None"""
+    try:
+        import resource
+    except ImportError:
+        try:
+            import psutil
+        except ImportError:
+            return None
+        info = psutil.Process().memory_info()
+        return round(getattr(info, 'peak_wset', info.rss) / 1024 / 1024, 1)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 单位为 KB，macOS 为字节
+    if sys.platform == 'darwin':
+        peak /= 1024
+    return round(peak / 1024, 1)
+
+def create_engine(name):
+    """按名称创建OCR引擎：'fake' 为确定性替身，'paddle' 使用 PaddleOCR（None 表示由提取器创建）"""
+    if name == 'fake':
+        from benchmark.fake_ocr import CodebookOCR
+        return CodebookOCR()
+    if name == 'paddle':
+        return None
+    raise ValueError(f"未知的OCR引擎: {name}")
+
+def timing_errors(truth, cues):
+    """按时间重叠把提取结果与真实字幕对应，统计起止时间误差、漏检和多余的字幕条目"""
+    start_errors = []
+    end_errors = []
+    matched = set()
+    missed = 0
+    for start, end, _ in truth:
+        best, best_overlap = None, 0.0
+        for index, (cue_start, cue_end, _) in enumerate(cues):
+            overlap = min(end, cue_end) - max(start, cue_start)
+            if overlap > best_overlap:
+                best, best_overlap = index, overlap
+        if best is None:
+            missed += 1
+            continue
+        matched.add(best)
+        start_errors.append(abs(cues[best][0] - start))
+        end_errors.append(abs(cues[best][1] - end))
+
+    def summary(errors):
+        if not errors:
+            return {'mean': None, 'max': None}
+        return {'mean': round(sum(errors) / len(errors), 3), 'max': round(max(errors), 3)}
+
+    return {
+        'cues_expected': len(truth),
+        'cues_extracted': len(cues),
+        'missed': missed,
+        'extra': len(cues) - len(matched),
+        'start_error': summary(start_errors),
+        'end_error': summary(end_errors)
+    }
+
+def run_case(video_path, truth, duration, frame_count, engine, options):
+    """在独立进程中运行一次提取，峰值内存只包含本次运行"""
+    from src.core.extractor import SubtitleExtractor
+    from src.core.writers import load_cues
+
+    options = dict(options, ocr_cache=False, checkpoint_interval=None)
+    extractor = SubtitleExtractor(ocr_engine=create_engine(engine), **options)
+    output_path = os.path.splitext(video_path)[0] + '.jsonl'
+    start = time.perf_counter()
+    stats = extractor.extract_subtitles(video_path, output_path, 'ch', SUBTITLE_AREA)
+    elapsed = time.perf_counter() - start
+    extractor.close()
+
+    cues = load_cues(output_path) if os.path.exists(output_path) else []
+    metrics = stats.get('metrics', {})
+    return {
+        'seconds': round(elapsed, 3),
+        'fps': round(frame_count / elapsed, 1),
+        'realtime_factor': round(duration / elapsed, 2),
+        'ocr_calls': stats.get('ocr_calls', 0),
+        'ocr_calls_per_minute': round(stats.get('ocr_calls', 0) / (duration / 60), 1),
+        'frames_sampled': stats.get('frames_sampled', 0),
+        'peak_rss_mb': peak_rss_mb(),
+        'accuracy': timing_errors(truth, cues),
+        'stages': {
+            name: {'count': histogram['count'], 'total_seconds': histogram['sum'], 'mean_seconds': histogram['mean']}
+            for name, histogram in metrics.get('histograms', {}).items()
+        }
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="字幕提取基准测试（合成视频）")
+    parser.add_argument('--resolutions', default='640x360,1280x720,1920x1080',
+                        help="逗号分隔的分辨率列表，如 640x360,1280x720")
+    parser.add_argument('--fps', default='25', help="逗号分隔的帧率列表")
+    parser.add_argument('--duration', type=float, default=60, help="每个视频的时长（秒）")
+    parser.add_argument('--seed', type=int, default=0, help="字幕内容和时间轴的随机种子")
+    parser.add_argument('--engine', default='fake', choices=['fake', 'paddle'], help="OCR引擎")
+    parser.add_argument('--option', action='append', default=[],
+                        help="传给 SubtitleExtractor 的参数 key=value，可重复")
+    parser.add_argument('--profiles', default=None,
+                        help="逗号分隔的预处理方案，逐个运行并报告各步骤耗时，如 default,fast,color_mask")
+    parser.add_argument('--workdir', default=None, help="合成视频的保存目录，默认使用临时目录")
+    parser.add_argument('--output', default=None, help="把结果保存为JSON文件")
+    args = parser.parse_args(argv)
+
+    options = parse_options(args.option)
+    workdir = args.workdir or tempfile.mkdtemp(prefix='subtitle_benchmark_')
+    os.makedirs(workdir, exist_ok=True)
+    context = multiprocessing.get_context('spawn')
+
+    results = []
+    for resolution in args.resolutions.split(','):
+        width, height = (int(value) for value in resolution.lower().split('x'))
+        for fps in (float(value) for value in args.fps.split(',')):
+            truth = make_cues(args.duration, fps, args.seed)
+            video_path = os.path.join(workdir, f"synthetic_{width}x{height}_{fps:g}fps_{args.duration:g}s.avi")
+            if not os.path.exists(video_path):
+                print(f"生成合成视频: {video_path}")
+                make_video(video_path, truth, args.duration, width, height, fps)
+
+            frame_count = int(round(args.duration * fps))
+            profiles = args.profiles.split(',') if args.profiles else [options.get('preprocess', 'default')]
+            for profile in profiles:
+                if options.get('detection') == 'projection' and profile in GRAYSCALE_PROFILES:
+                    print(f"跳过预处理方案 {profile}: 投影切行需要二值化")
+                    continue
+                case_options = dict(options, preprocess=profile)
+                with context.Pool(1) as pool:
+                    result = pool.apply(run_case, (video_path, truth, args.duration, frame_count, args.engine,
+                                                   case_options))
+                result.update({'resolution': resolution, 'video_fps': fps, 'profile': profile})
+                results.append(result)
+                accuracy = result['accuracy']
+                print(f"{resolution} @ {fps:g}fps [{profile}]: {result['fps']} 帧/秒 ({result['realtime_factor']}x 实时), "
+                      f"OCR {result['ocr_calls_per_minute']} 次/分钟, 峰值内存 {result['peak_rss_mb']} MB, "
+                      f"起止误差 {accuracy['start_error']['mean']}/{accuracy['end_error']['mean']} 秒, "
+                      f"漏检 {accuracy['missed']}, 多余 {accuracy['extra']}")
+                steps = {
+                    name[len('preprocess.'):]: stage['mean_seconds'] * 1000
+                    for name, stage in result['stages'].items() if name.startswith('preprocess.')
+                }
+                if steps:
+                    print("  预处理步骤平均耗时: " + ", ".join(f"{name} {ms:.3f} ms" for name, ms in steps.items()))
+
+    report = {'options': options, 'engine': args.engine, 'duration': args.duration, 'results': results}
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"结果已保存到: {args.output}")
+    return report
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+import random
+import cv2
+import numpy as np
+
+# 字幕所在的纵向范围（相对高度），与 SubtitleExtractor 的 subtitle_area 含义相同
+SUBTITLE_AREA = (0.8, 0.95)
+
+WORDS = ['alpha', 'bravo', 'charlie', 'delta', 'echo', 'foxtrot', 'golf', 'hotel',
+         'india', 'juliet', 'kilo', 'lima', 'mike', 'november', 'oscar', 'papa']
+
+def make_cues(duration, fps, seed=0, min_seconds=1.0, max_seconds=4.0):
+    """生成字幕时间轴 [(开始时间, 结束时间, 文本)]，时间对齐到帧；部分字幕首尾相接，部分之间有空白"""
+    rng = random.Random(seed)
+    cues = []
+    start = 0.5
+    while start + min_seconds < duration - 0.5:
+        end = min(start + rng.uniform(min_seconds, max_seconds), duration - 0.5)
+        text = f"{len(cues) + 1:03d} " + " ".join(rng.sample(WORDS, rng.randint(2, 4)))
+        start_frame = int(round(start * fps))
+        end_frame = int(round(end * fps))
+        cues.append((start_frame / fps, end_frame / fps, text))
+        start = end + rng.choice([0.0, 0.0, 0.5, 1.5])
+    return cues
+
+def make_video(path, cues, duration, width=1280, height=720, fps=25, area=SUBTITLE_AREA):
+    """用 cv2.VideoWriter 写出带字幕的合成视频：缓慢移动的渐变背景 + 运动方块 + putText 字幕"""
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), fps, (width, height))
+    if not writer.isOpened():
+        raise IOError(f"无法创建视频文件: {path}")
+
+    # 水平往返渐变（周期为两倍宽度，平移时没有突变的边缘），逐帧平移，模拟画面内容变化
+    ramp = np.linspace(40, 160, width).astype(np.uint8)
+    gradient = np.tile(np.concatenate([ramp, ramp[::-1]]), (height, 1))
+    gradient = cv2.merge([gradient, np.roll(gradient, width // 3, axis=1), np.roll(gradient, width // 2, axis=1)])
+    font_scale = height / 720 * 1.2
+    thickness = max(1, int(round(height / 360)))
+    band_top = int(height * area[0])
+    band_bottom = int(height * area[1])
+    box = max(8, height // 8)
+
+    try:
+        total_frames = int(round(duration * fps))
+        cue_index = 0
+        for frame_index in range(total_frames):
+            offset = (frame_index * 2) % width
+            frame = np.ascontiguousarray(gradient[:, offset:offset + width])
+            x = (frame_index * 7) % max(width - box, 1)
+            cv2.rectangle(frame, (x, height // 4), (x + box, height // 4 + box), (30, 200, 240), -1)
+
+            t = frame_index / fps
+            while cue_index < len(cues) and t >= cues[cue_index][1]:
+                cue_index += 1
+            if cue_index < len(cues) and cues[cue_index][0] <= t:
+                _put_subtitle(frame, cues[cue_index][2], font_scale, thickness, band_top, band_bottom)
+            writer.write(frame)
+    finally:
+        writer.release()
+
+def _put_subtitle(frame, text, font_scale, thickness, band_top, band_bottom):
+    """字幕带内居中绘制白字黑边的文本"""
+    font = cv2.FONT_HERSHEY_SIMPLEX
+    (text_width, text_height), _ = cv2.getTextSize(text, font, font_scale, thickness)
+    x = max(0, (frame.shape[1] - text_width) // 2)
+    y = (band_top + band_bottom + text_height) // 2
+    cv2.putText(frame, text, (x, y), font, font_scale, (0, 0, 0), thickness + 3, cv2.LINE_AA)
+    cv2.putText(frame, text, (x, y), font, font_scale, (255, 255, 255), thickness, cv2.LINE_AA)
@@ -0,0 +1,14 @@
+import sys
+import os
+import multiprocessing
+
+# 将项目根目录添加到 Python 路径
+project_root = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(project_root)
+
+from src.cli import main
+
+if __name__ == '__main__':
+    # 打包为可执行文件后，OCR工作进程需要由此入口启动
+    multiprocessing.freeze_support()
+    sys.exit(main())
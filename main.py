@@ -1,5 +1,6 @@
 import sys
 import os
+import multiprocessing
 
 # 将项目根目录添加到 Python 路径
 project_root = os.path.dirname(os.path.abspath(__file__))
@@ -9,6 +10,8 @@ from src.gui.main_window import MainWindow
 from PyQt5.QtWidgets import QApplication
 
 if __name__ == '__main__':
+    # 打包为可执行文件后，OCR工作进程需要由此入口启动
+    multiprocessing.freeze_support()
     app = QApplication(sys.argv)
     window = MainWindow()
     window.show()
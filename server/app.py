@@ -1,26 +1,291 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
+from typing import List, Optional
 import aiohttp
+import asyncio
+import json
 import os
+import sys
+import threading
+import time
 import uuid
-from subtitle_extractor import SubtitleExtractor
+
+# 将项目根目录添加到 Python 路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from src.core.metrics import Metrics
+from src.core.pool import ExtractorPool, default_worker_count
+from src.core.writers import WRITERS
+
+# 处理进程数，以及排队+处理中的视频数上限，超过时返回 429
+WORKERS = int(os.environ.get('SUBTITLE_WORKERS', 0)) or default_worker_count()
+MAX_PENDING = int(os.environ.get('SUBTITLE_MAX_PENDING', 0)) or WORKERS * 4
+# 事件流两次推送之间的最小间隔（秒），期间的更新合并为一次
+EVENT_INTERVAL = 0.5
+# 已结束的任务保留的时间（秒），之后从内存中移除（字幕文件不删除）
+JOB_TTL = int(os.environ.get('SUBTITLE_JOB_TTL', 0)) or 3600
+# 检查处理进程是否意外退出、清理过期任务的间隔（秒）
+WORKER_CHECK_INTERVAL = 2.0
 
 app = FastAPI()
 
 class VideoURL(BaseModel):
     url: str
 
+class ProcessRequest(BaseModel):
+    paths: List[str]
+    # (上, 下) 或 (x1, y1, x2, y2) 比例；不指定时自动检测字幕区域，检测不到时处理整个画面
+    subtitle_area: Optional[List[float]] = None
+    # 输出格式: srt / vtt / jsonl
+    output_format: str = "srt"
+
+class IngestRequest(BaseModel):
+    url: str
+    subtitle_area: Optional[List[float]] = None
+    # 是否同时保存下载的视频文件
+    keep_file: bool = False
+    output_format: str = "srt"
+
+class JobManager:
+    """任务队列：请求只登记任务，由常驻进程池（预加载OCR引擎）在后台处理"""
+
+    def __init__(self, workers, max_pending):
+        self.pool = ExtractorPool(workers)
+        self.max_pending = max_pending
+        self.jobs = {}
+        self.pending = 0
+        self.lock = threading.Lock()
+        self.dispatcher = threading.Thread(target=self._dispatch, daemon=True)
+        # 事件流订阅者：任务ID -> asyncio.Event 集合，任务有更新时置位
+        self.watchers = {}
+        self.loop = None
+        # 所有已完成视频的计数和各阶段耗时汇总，由 /metrics 导出
+        self.metrics = Metrics()
+
+    def start(self, loop=None):
+        self.loop = loop
+        self.pool.start()
+        self.dispatcher.start()
+
+    def close(self):
+        self.pool.stop()
+        self.pool.close()
+
+    def submit(self, paths, subtitle_area=None, output_paths=None, save_stream_to=None,
+               output_format="srt"):
+        """登记一个任务，进程池已满时返回 None"""
+        if output_paths is None:
+            output_paths = [f"{path}_subtitles.{output_format}" for path in paths]
+        with self.lock:
+            if self.pending + len(paths) > self.max_pending:
+                return None
+            job_id = uuid.uuid4().hex
+            self.jobs[job_id] = {
+                'job_id': job_id,
+                'status': 'queued',
+                'videos': [
+                    {
+                        'path': path,
+                        'status': 'queued',
+                        'progress': 0.0,
+                        'subtitle_path': output_path,
+                        'error': None,
+                        'cues': [],
+                        'stats': None
+                    }
+                    for path, output_path in zip(paths, output_paths)
+                ]
+            }
+            self.pending += len(paths)
+        self.metrics.count('jobs_submitted')
+
+        for index, video in enumerate(self.jobs[job_id]['videos']):
+            self.pool.submit((job_id, index), video['path'], video['subtitle_path'], subtitle_area,
+                             save_stream_to=save_stream_to)
+        return job_id
+
+    def get(self, job_id):
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return None
+            return self._summary(job)
+
+    def updates(self, job_id, cursors=None):
+        """任务当前状态，以及每个视频在 cursors 之后新完成的字幕，返回 (状态, 新字幕, 新游标)"""
+        with self.lock:
+            job = self.jobs[job_id]
+            cursors = cursors or [0] * len(job['videos'])
+            cues = [
+                (index, cue)
+                for index, video in enumerate(job['videos'])
+                for cue in video['cues'][cursors[index]:]
+            ]
+            return self._summary(job), cues, [len(video['cues']) for video in job['videos']]
+
+    def watch(self, job_id):
+        """订阅任务更新，返回在事件循环中等待的 asyncio.Event"""
+        event = asyncio.Event()
+        with self.lock:
+            self.watchers.setdefault(job_id, set()).add(event)
+        return event
+
+    def unwatch(self, job_id, event):
+        with self.lock:
+            watchers = self.watchers.get(job_id)
+            if watchers:
+                watchers.discard(event)
+                if not watchers:
+                    del self.watchers[job_id]
+
+    def _summary(self, job):
+        videos = [
+            {key: value for key, value in video.items() if key != 'cues'}
+            for video in job['videos']
+        ]
+        progress = sum(video['progress'] for video in videos) / len(videos) if videos else 1.0
+        return dict(job, videos=videos, progress=progress)
+
+    def _notify(self, job_id):
+        """唤醒订阅者；多次更新只会置位一次，慢速客户端不会阻塞处理进程"""
+        if self.loop is None:
+            return
+        for event in self.watchers.get(job_id, ()):
+            self.loop.call_soon_threadsafe(event.set)
+
+    def available(self):
+        """是否还有能处理视频的进程（所有进程的OCR引擎都加载失败时为 False）"""
+        return self.pool.has_workers()
+
+    def _dispatch(self):
+        """读取进程池消息并更新任务状态"""
+        last_check = time.monotonic()
+        while True:
+            message = self.pool.get_message(timeout=1)
+            # 消息暂时读完时，以及消息不断时每隔一段时间，检查进程和过期任务
+            if message is None or time.monotonic() - last_check >= WORKER_CHECK_INTERVAL:
+                last_check = time.monotonic()
+                self._check_workers()
+                self._evict_jobs()
+            if message is None:
+                continue
+            kind, task_id, payload = message
+            if task_id is None:
+                if kind == 'error':
+                    print(payload)
+                continue
+
+            job_id, index = task_id
+            with self.lock:
+                job = self.jobs.get(job_id)
+                if job is None:
+                    continue
+                video = job['videos'][index]
+                # 已按进程崩溃结束的视频，忽略之后到达的消息
+                if video['status'] not in ('queued', 'running'):
+                    continue
+                if kind == 'started':
+                    video['status'] = 'running'
+                    job['status'] = 'running'
+                elif kind == 'progress':
+                    video['progress'] = payload
+                elif kind == 'stats':
+                    video['stats'] = payload
+                elif kind == 'cue':
+                    video['cues'].append(payload)
+                elif kind == 'done':
+                    video['stats'] = payload['stats']
+                    self.metrics.merge(payload['stats'].get('metrics'))
+                    # 处理中出错（如下载中断）时只得到部分字幕
+                    error = payload['stats'].get('error')
+                    self._finish(job, video, 'failed' if error else 'done', error)
+                elif kind in ('failed', 'interrupted'):
+                    self._finish(job, video, 'failed', payload)
+                self._notify(job_id)
+
+    def _check_workers(self):
+        """处理中崩溃的进程由进程池重新启动，它正在处理的视频记为失败；
+        所有进程的OCR引擎都加载失败时，排队的视频不会被处理，全部记为失败"""
+        lost = self.pool.check_workers()
+        available = self.pool.has_workers()
+        if not lost and available:
+            return
+        with self.lock:
+            for job_id, index in lost:
+                job = self.jobs.get(job_id)
+                if job and job['videos'][index]['status'] in ('queued', 'running'):
+                    self._finish(job, job['videos'][index], 'failed', "处理进程意外退出")
+                    self._notify(job_id)
+            if not available:
+                for job_id, job in self.jobs.items():
+                    for video in job['videos']:
+                        if video['status'] in ('queued', 'running'):
+                            self._finish(job, video, 'failed', "OCR引擎加载失败")
+                    self._notify(job_id)
+
+    def _finish(self, job, video, status, error=None):
+        """结束一个视频（调用方持有锁）"""
+        video['status'] = status
+        video['progress'] = 1.0
+        if error is not None:
+            video['error'] = error
+        self.metrics.count('videos_done' if status == 'done' else 'videos_failed')
+        self.pending -= 1
+        self._update_job_status(job)
+
+    def _evict_jobs(self):
+        """移除结束超过 JOB_TTL 秒、且没有事件流订阅者的任务"""
+        now = time.time()
+        with self.lock:
+            expired = [
+                job_id for job_id, job in self.jobs.items()
+                if job.get('finished_at') and now - job['finished_at'] > JOB_TTL and job_id not in self.watchers
+            ]
+            for job_id in expired:
+                del self.jobs[job_id]
+
+    def metrics_snapshot(self):
+        """已完成视频的汇总加上处理中视频最近一次发来的统计，返回 (Metrics, 排队和处理中的视频数)"""
+        snapshot = Metrics()
+        snapshot.merge(self.metrics.report())
+        with self.lock:
+            for job in self.jobs.values():
+                for video in job['videos']:
+                    if video['status'] == 'running' and video['stats']:
+                        snapshot.merge(video['stats'].get('metrics'))
+            pending = self.pending
+        return snapshot, pending
+
+    def _update_job_status(self, job):
+        statuses = [video['status'] for video in job['videos']]
+        if any(status in ('queued', 'running') for status in statuses):
+            return
+        job['status'] = 'done' if all(status == 'done' for status in statuses) else 'failed'
+        job['finished_at'] = time.time()
+
+jobs = JobManager(WORKERS, MAX_PENDING)
+
+@app.on_event("startup")
+async def start_workers():
+    jobs.start(asyncio.get_running_loop())
+
+@app.on_event("shutdown")
+def stop_workers():
+    jobs.close()
+
 @app.post("/download")
 async def download_video(video: VideoURL):
     try:
         # 创建下载目录
         download_dir = "downloads"
         os.makedirs(download_dir, exist_ok=True)
-        
+
         # 生成唯一文件名
         filename = f"{uuid.uuid4()}.mp4"
         filepath = os.path.join(download_dir, filename)
-        
+
         # 下载视频
         async with aiohttp.ClientSession() as session:
             async with session.get(video.url) as response:
@@ -30,29 +295,136 @@ async def download_video(video: VideoURL):
                         if not chunk:
                             break
                         f.write(chunk)
-        
+
         return {"status": "success", "server_path": filepath}
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
+def _check_format(output_format):
+    if '.' + output_format not in WRITERS:
+        raise HTTPException(status_code=400, detail=f"不支持的输出格式: {output_format}")
+
+def _check_area(subtitle_area):
+    if subtitle_area and len(subtitle_area) not in (2, 4):
+        raise HTTPException(status_code=400, detail="字幕区域应为 [上, 下] 或 [x1, y1, x2, y2] 比例")
+
+def _check_workers():
+    if not jobs.available():
+        raise HTTPException(status_code=503, detail="OCR引擎加载失败，无法处理视频")
+
+@app.post("/ingest")
+async def ingest_video(request: IngestRequest):
+    """边下载边提取字幕：视频数据直接送入解码，不需要先调用 /download"""
+    if not request.url.startswith(('http://', 'https://')):
+        raise HTTPException(status_code=400, detail="只支持 http(s) 地址")
+    download_dir = "downloads"
+    os.makedirs(download_dir, exist_ok=True)
+
+    _check_format(request.output_format)
+    _check_area(request.subtitle_area)
+    _check_workers()
+    name = uuid.uuid4().hex
+    subtitle_path = os.path.join(download_dir, f"{name}.{request.output_format}")
+    video_path = os.path.join(download_dir, f"{name}.mp4") if request.keep_file else None
+    job_id = jobs.submit([request.url], request.subtitle_area, [subtitle_path], video_path)
+    if job_id is None:
+        raise HTTPException(
+            status_code=429,
+            detail="处理队列已满，请稍后重试",
+            headers={"Retry-After": "10"}
+        )
+    return {"status": "accepted", "job_id": job_id, "server_path": video_path}
+
 @app.post("/process")
-async def process_videos(request: dict):
-    video_paths = request["paths"]
-    try:
-        # 处理视频并提取字幕
-        extractor = SubtitleExtractor()
-        results = []
-        
-        for path in video_paths:
-            output_path = f"{path}_subtitles.srt"
-            extractor.extract_subtitles(
-                path,
-                output_path,
-                'ch',
-                subtitle_area=None  # 可以从请求中获取
-            )
-            results.append(output_path)
-            
-        return {"status": "success", "subtitle_paths": results}
-    except Exception as e:
-        return {"status": "error", "message": str(e)} 
\ No newline at end of file
+async def process_videos(request: ProcessRequest):
+    if not request.paths:
+        raise HTTPException(status_code=400, detail="未提供视频路径")
+    _check_format(request.output_format)
+    _check_area(request.subtitle_area)
+    _check_workers()
+    # 只登记任务并立即返回任务ID，处理在后台进程池中进行
+    job_id = jobs.submit(request.paths, request.subtitle_area, output_format=request.output_format)
+    if job_id is None:
+        raise HTTPException(
+            status_code=429,
+            detail="处理队列已满，请稍后重试",
+            headers={"Retry-After": "10"}
+        )
+    return {"status": "accepted", "job_id": job_id}
+
+@app.get("/jobs/{job_id}")
+async def job_status(job_id: str):
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="任务不存在")
+    return job
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    """以 Server-Sent Events 推送任务进度、新完成的字幕和各阶段统计
+
+    事件类型: cue（一条字幕）、progress（进度和统计）、end（任务结束）。
+    """
+    if jobs.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="任务不存在")
+
+    async def stream():
+        event = jobs.watch(job_id)
+        cursors = None
+        last_progress = None
+        try:
+            while True:
+                job, cues, cursors = jobs.updates(job_id, cursors)
+                for index, (start, end, text) in cues:
+                    yield _sse('cue', {'video': index, 'start': start, 'end': end, 'text': text})
+                progress = {
+                    'status': job['status'],
+                    'progress': job['progress'],
+                    'videos': [
+                        {key: video[key] for key in ('status', 'progress', 'stats', 'error')}
+                        for video in job['videos']
+                    ]
+                }
+                if progress != last_progress:
+                    last_progress = progress
+                    yield _sse('progress', progress)
+                if job['status'] not in ('queued', 'running'):
+                    yield _sse('end', {'status': job['status']})
+                    return
+                await event.wait()
+                event.clear()
+                # 合并这段时间内的所有更新，只推送最新状态
+                await asyncio.sleep(EVENT_INTERVAL)
+        finally:
+            jobs.unwatch(job_id, event)
+
+    return StreamingResponse(stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache"})
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus 格式的处理统计（包括处理中视频的各阶段耗时）"""
+    snapshot, pending = jobs.metrics_snapshot()
+    return (
+        snapshot.to_prometheus()
+        + "# TYPE subtitle_extractor_pending_videos gauge\n"
+        + f"subtitle_extractor_pending_videos {pending}\n"
+        + "# TYPE subtitle_extractor_workers gauge\n"
+        + f"subtitle_extractor_workers {jobs.pool.workers}\n"
+    )
+
+@app.get("/jobs/{job_id}/result")
+async def job_result(job_id: str):
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="任务不存在")
+    if job['status'] in ('queued', 'running'):
+        raise HTTPException(status_code=409, detail="任务尚未完成")
+    return {
+        "status": "success" if job['status'] == 'done' else "error",
+        "subtitle_paths": [video['subtitle_path'] for video in job['videos'] if video['status'] == 'done'],
+        "errors": {video['path']: video['error'] for video in job['videos'] if video['error']}
+    }
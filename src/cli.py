@@ -0,0 +1,303 @@
+"""命令行批量提取字幕（不依赖图形界面，不导入 PyQt5）
+
+    python cli.py "videos/**/*.mp4" --area 0.8,0.95 --workers 2 --summary summary.json
+    python cli.py --manifest jobs.json --output-dir subtitles --format vtt
+
+清单文件为 JSON 数组（或每行一个 JSON 对象的 JSONL），每项可指定：
+    {"video": "a.mp4", "output": "a.srt", "subtitle_area": [0.1, 0.8, 0.9, 0.95], "lang": "ch"}
+未指定字幕区域时使用 --area，也没有 --area 时自动检测。
+
+退出码: 0 全部成功；1 有视频处理失败；2 参数或输入错误；3 OCR引擎无法加载；130 被中断。
+"""
+import argparse
+import contextlib
+import glob
+import json
+import os
+import sys
+import time
+
+from src.core.checkpoint import checkpoint_path, write_atomic
+from src.core.options import parse_options
+from src.core.urls import is_stream_url
+from src.core.pool import ExtractorPool, default_worker_count
+from src.core.writers import WRITERS
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+EXIT_ENGINE = 3
+EXIT_INTERRUPTED = 130
+
+def parse_area(value):
+    """解析 "上,下" 或 "x1,y1,x2,y2" 形式的字幕区域比例"""
+    if value is None:
+        return None
+    area = [float(part) for part in value.split(',')]
+    if len(area) not in (2, 4):
+        raise ValueError(f"字幕区域应为 上,下 或 x1,y1,x2,y2 比例: {value}")
+    return area
+
+def load_manifest(path):
+    """读取清单文件，返回任务列表；每项为字符串（视频路径）或对象"""
+    with open(path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    if path.lower().endswith('.json'):
+        entries = json.loads(content)
+        if isinstance(entries, dict):
+            entries = entries.get('videos', [])
+    else:
+        entries = [json.loads(line) for line in content.splitlines() if line.strip()]
+    return [entry if isinstance(entry, dict) else {'video': entry} for entry in entries]
+
+def expand_inputs(patterns):
+    """展开通配符（支持 **），网络地址和不含通配符的路径原样保留"""
+    videos = []
+    for pattern in patterns:
+        if is_stream_url(pattern) or not glob.has_magic(pattern):
+            videos.append(pattern)
+            continue
+        matches = sorted(glob.glob(pattern, recursive=True))
+        if not matches:
+            print(f"没有匹配的文件: {pattern}")
+        videos.extend(path for path in matches if os.path.isfile(path))
+    return videos
+
+def default_output_path(video_path, output_dir, output_format):
+    """输出文件路径：指定目录时放入该目录，否则与视频放在一起"""
+    if is_stream_url(video_path):
+        name = os.path.basename(video_path.split('?')[0].rstrip('/')) or 'stream'
+    else:
+        name = os.path.basename(video_path)
+    base_name = os.path.splitext(name)[0]
+    directory = output_dir or (os.path.dirname(video_path) if not is_stream_url(video_path) else '.')
+    return os.path.join(directory, f"{base_name}.{output_format}")
+
+def build_tasks(args):
+    """合并命令行输入和清单文件，返回任务列表"""
+    area = parse_area(args.area)
+    entries = [{'video': video} for video in expand_inputs(args.inputs)]
+    if args.manifest:
+        entries += load_manifest(args.manifest)
+
+    tasks = []
+    seen = set()
+    for entry in entries:
+        video = entry.get('video') or entry.get('path')
+        if not video:
+            raise ValueError(f"清单中的任务缺少视频路径: {entry}")
+        if not is_stream_url(video) and not os.path.isfile(video):
+            raise ValueError(f"视频文件不存在: {video}")
+        output = entry.get('output') or default_output_path(video, args.output_dir, args.format)
+        # 同一输出文件只处理一次
+        if output in seen:
+            continue
+        seen.add(output)
+        subtitle_area = entry.get('subtitle_area', area)
+        if subtitle_area is not None and len(subtitle_area) not in (2, 4):
+            raise ValueError(f"字幕区域应为 [上, 下] 或 [x1, y1, x2, y2] 比例: {video}")
+        tasks.append({
+            'video': video,
+            'output': output,
+            'subtitle_area': subtitle_area,
+            'lang': entry.get('lang', args.lang)
+        })
+    return tasks
+
+def run(tasks, workers, extractor_options, result_store=True, skip_existing=False):
+    """用进程池处理全部任务，返回每个任务的结果和是否被中断"""
+    results = [
+        {'video': task['video'], 'output': task['output'], 'status': 'queued', 'error': None}
+        for task in tasks
+    ]
+    todo = []
+    for index, task in enumerate(tasks):
+        # 已有输出且没有未完成的检查点时跳过
+        if skip_existing and os.path.exists(task['output']) and not os.path.exists(checkpoint_path(task['output'])):
+            results[index]['status'] = 'skipped'
+        else:
+            todo.append(index)
+    if not todo:
+        return results, False
+
+    pool = ExtractorPool(workers, extractor_options, result_store=result_store)
+    interrupted = False
+    try:
+        pool.start()
+        ready = failed = 0
+        while ready + failed < pool.workers:
+            message = pool.get_message(timeout=0.5)
+            if message is None:
+                if not pool.is_alive():
+                    break
+                continue
+            if message[0] == 'ready':
+                ready += 1
+            elif message[0] == 'error':
+                failed += 1
+                print(message[2])
+        if not ready:
+            raise RuntimeError("OCR引擎加载失败")
+        print(f"{ready} 个处理进程就绪，共 {len(todo)} 个视频")
+
+        started = {}
+        for index in todo:
+            task = tasks[index]
+            output_dir = os.path.dirname(task['output'])
+            if output_dir:
+                os.makedirs(output_dir, exist_ok=True)
+            pool.submit(index, task['video'], task['output'], task['subtitle_area'], task['lang'])
+
+        remaining = len(todo)
+        try:
+            while remaining:
+                message = pool.get_message(timeout=1)
+                if message is None:
+                    if not pool.is_alive():
+                        for index in todo:
+                            if results[index]['status'] in ('queued', 'running'):
+                                results[index].update(status='failed', error="处理进程意外退出")
+                        break
+                    continue
+                kind, index, payload = message
+                if index is None:
+                    continue
+                result = results[index]
+                if kind == 'started':
+                    started[index] = time.time()
+                    result['status'] = 'running'
+                    print(f"开始处理: {result['video']}")
+                elif kind in ('done', 'failed', 'interrupted'):
+                    remaining -= 1
+                    result['seconds'] = round(time.time() - started.get(index, time.time()), 3)
+                    if kind == 'done':
+                        _record_stats(result, payload['stats'])
+                    else:
+                        result.update(status=kind, error=payload)
+                    print(f"[{len(todo) - remaining}/{len(todo)}] {result['status']}: {result['video']}"
+                          + (f" ({result['error']})" if result['error'] else ""))
+        except KeyboardInterrupt:
+            interrupted = True
+            print("正在中断处理...")
+            pool.stop()
+            # 等待进程回报当前任务的中断（已写入的字幕和检查点会保留）
+            deadline = time.monotonic() + 10
+            while remaining and time.monotonic() < deadline and pool.is_alive():
+                message = pool.get_message(timeout=0.5)
+                if message and message[1] is not None and message[0] in ('done', 'failed', 'interrupted'):
+                    remaining -= 1
+                    if message[0] == 'done':
+                        _record_stats(results[message[1]], message[2]['stats'])
+                    else:
+                        results[message[1]].update(status=message[0], error=message[2])
+            for index in todo:
+                if results[index]['status'] in ('queued', 'running'):
+                    results[index]['status'] = 'interrupted'
+    finally:
+        pool.close()
+    return results, interrupted
+
+def _record_stats(result, stats):
+    """把完成消息中的统计整理为摘要字段"""
+    counters = stats.get('metrics', {}).get('counters', {})
+    if stats.get('result_cached'):
+        result['status'] = 'cached'
+    elif 'error' in stats:
+        result.update(status='failed', error=stats['error'])
+    else:
+        result['status'] = 'done'
+    if not os.path.exists(result['output']):
+        # 未提取到任何字幕时不生成文件
+        result['output'] = None
+    for key in ('subtitle_area', 'area_confidence', 'frames_sampled', 'ocr_calls'):
+        if key in stats:
+            result[key] = stats[key]
+    if 'cues_emitted' in counters:
+        result['cues'] = counters['cues_emitted']
+
+@contextlib.contextmanager
+def stdout_to_stderr():
+    """标准输出（包括之后启动的处理进程）改写到标准错误，返回原标准输出供写入结果"""
+    sys.stdout.flush()
+    saved = os.dup(1)
+    os.dup2(2, 1)
+    try:
+        with os.fdopen(os.dup(saved), 'w', encoding='utf-8') as stream:
+            yield stream
+    finally:
+        sys.stdout.flush()
+        os.dup2(saved, 1)
+        os.close(saved)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="命令行批量提取视频字幕")
+    parser.add_argument('inputs', nargs='*', help="视频文件、通配符（如 \"videos/**/*.mp4\"）或 http(s) 地址")
+    parser.add_argument('--manifest', help="任务清单（JSON 数组或 JSONL），可为每个视频指定输出和字幕区域")
+    parser.add_argument('--area', help="默认字幕区域比例：上,下 或 x1,y1,x2,y2；不指定时自动检测")
+    parser.add_argument('--lang', default='ch', help="字幕语言")
+    parser.add_argument('--output-dir', help="输出目录，默认与视频放在一起")
+    parser.add_argument('--format', default='srt', choices=[ext.lstrip('.') for ext in WRITERS], help="输出格式")
+    parser.add_argument('--workers', type=int, default=0, help="处理进程数，默认按CPU核心数决定")
+    parser.add_argument('--option', action='append', default=[],
+                        help="传给 SubtitleExtractor 的参数 key=value，可重复")
+    parser.add_argument('--summary', help="把处理结果摘要写入JSON文件（- 表示输出到标准输出，此时日志输出到标准错误）")
+    parser.add_argument('--skip-existing', action='store_true', help="跳过已有输出文件的视频")
+    parser.add_argument('--no-result-store', action='store_true', help="不复用结果库中已处理过的结果")
+    args = parser.parse_args(argv)
+    if args.summary != '-':
+        return process(args)
+    # 摘要输出到标准输出时日志改到标准错误，标准输出只有JSON
+    with stdout_to_stderr() as summary_stream:
+        return process(args, summary_stream)
+
+def process(args, summary_stream=None):
+    """处理命令行指定的全部视频，返回退出码；summary_stream 不为 None 时把摘要写入其中"""
+    started = time.time()
+    code, results, error = run_tasks(args)
+    statuses = [result['status'] for result in results]
+    summary = {
+        'exit_code': code,
+        'error': error,
+        'total': len(results),
+        'succeeded': sum(status in ('done', 'cached', 'skipped') for status in statuses),
+        'failed': statuses.count('failed'),
+        'interrupted': statuses.count('interrupted'),
+        'seconds': round(time.time() - started, 3),
+        'videos': results
+    }
+    if results:
+        print(f"处理完成: 成功 {summary['succeeded']}，失败 {summary['failed']}，"
+              f"中断 {summary['interrupted']}，共 {summary['total']} 个视频")
+    # 参数错误、引擎加载失败或中断时同样写出摘要，调用方总能读到退出原因
+    if summary_stream:
+        summary_stream.write(json.dumps(summary, ensure_ascii=False, indent=2) + '\n')
+    elif args.summary:
+        write_atomic(args.summary, json.dumps(summary, ensure_ascii=False, indent=2))
+    return code
+
+def run_tasks(args):
+    """返回 (退出码, 每个视频的结果, 错误信息)"""
+    try:
+        tasks = build_tasks(args)
+    except (OSError, ValueError) as e:
+        print(f"输入错误: {str(e)}")
+        return EXIT_USAGE, [], f"输入错误: {str(e)}"
+    if not tasks:
+        print("没有需要处理的视频")
+        return EXIT_USAGE, [], "没有需要处理的视频"
+
+    workers = args.workers or default_worker_count(len(tasks))
+    try:
+        results, interrupted = run(tasks, workers, parse_options(args.option),
+                                   result_store=not args.no_result_store, skip_existing=args.skip_existing)
+    except RuntimeError as e:
+        print(str(e))
+        return EXIT_ENGINE, [], str(e)
+    except KeyboardInterrupt:
+        print("处理被中断")
+        return EXIT_INTERRUPTED, [], "处理被中断"
+
+    if interrupted:
+        return EXIT_INTERRUPTED, results, None
+    failed = any(result['status'] in ('failed', 'interrupted') for result in results)
+    return (EXIT_FAILED if failed else EXIT_OK), results, None
@@ -0,0 +1,150 @@
+import cv2
+
+class SeekableFrameReader:
+    """支持前向跳帧和回退读取的帧读取器，只返回裁剪后的灰度字幕带"""
+
+    def __init__(self, video_path, crop):
+        self.video_path = video_path
+        # crop(frame) -> 字幕区域
+        self.crop = crop
+        self.cap = None
+        self.fps = 0
+        self.total_frames = 0
+        # 下一次 grab() 将得到的帧号
+        self.position = 0
+        # 解码用的帧缓冲区，裁剪转灰度后即可复用
+        self.frame = None
+
+    def open(self, start_frame=0):
+        self.cap = cv2.VideoCapture(self.video_path)
+        if not self.cap.isOpened():
+            return False
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 25.0
+        self.total_frames = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        self.seek(start_frame)
+        return True
+
+    def seek(self, frame_index):
+        if frame_index != self.position:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, frame_index)
+            self.position = frame_index
+
+    def read(self, frame_index):
+        """读取指定帧，目标在当前位置之后时只 grab 中间的帧"""
+        if frame_index < self.position:
+            self.seek(frame_index)
+        while self.position < frame_index:
+            if not self.cap.grab():
+                return None
+            self.position += 1
+        ret, frame = self.cap.read(self.frame)
+        if not ret:
+            return None
+        self.frame = frame
+        self.position += 1
+        return self._gray(frame)
+
+    def read_range(self, start_frame, end_frame):
+        """顺序读取 [start_frame, end_frame) 的所有帧"""
+        self.seek(start_frame)
+        bands = []
+        for frame_index in range(start_frame, end_frame):
+            band = self.read(frame_index)
+            if band is None:
+                break
+            bands.append(band)
+        return bands
+
+    def release(self):
+        if self.cap:
+            self.cap.release()
+            self.cap = None
+
+    def _gray(self, frame):
+        return cv2.cvtColor(self.crop(frame), cv2.COLOR_BGR2GRAY)
+
+class AdaptiveSampler:
+    """自适应采样：文本稳定时逐步加大步长，文本变化时在两次采样之间二分查找变化帧"""
+
+    def __init__(self, reader, recognize, change_detector, min_step, max_step):
+        self.reader = reader
+        # recognize(灰度字幕带) -> 文本
+        self.recognize = recognize
+        self.change_detector = change_detector
+        self.min_step = max(1, min_step)
+        self.max_step = max(self.min_step, max_step)
+        self.stats = {
+            'frames_sampled': 0,
+            'ocr_skipped': 0,
+            'bisections': 0
+        }
+
+    def run(self, start_frame, end_frame, callback=None):
+        """依次产出 (文本开始的帧号, 文本)，最后一项为 (结束帧号, None)"""
+        lo = start_frame
+        band = self.reader.read(lo)
+        if band is None:
+            return
+        lo_sample = self._sample(band, [])
+        yield lo, lo_sample[1]
+
+        step = self.min_step
+        while lo + 1 < end_frame:
+            if callback:
+                callback((lo - start_frame) / max(end_frame - start_frame, 1))
+
+            hi = min(lo + step, end_frame - 1)
+            band = self.reader.read(hi)
+            if band is None:
+                break
+            hi_sample = self._sample(band, [lo_sample])
+
+            if hi_sample[1] == lo_sample[1]:
+                # 文本稳定，加大步长
+                lo, lo_sample = hi, hi_sample
+                step = min(step * 2, self.max_step)
+                continue
+
+            # 文本变化，回到 lo 之后读取区间内的帧并二分定位变化位置
+            bands = self.reader.read_range(lo + 1, hi) if hi - lo > 1 else []
+            if len(bands) == hi - lo - 1 > 0:
+                self.stats['bisections'] += 1
+                window = [lo_sample] + [(self.change_detector.signature(b), None, b) for b in bands] + [hi_sample]
+                changes = self._bisect(window, 0, len(window) - 1)
+            else:
+                changes = [(hi - lo, hi_sample[1])]
+            for offset, text in changes:
+                yield lo + offset, text
+
+            lo, lo_sample = hi, hi_sample
+            step = self.min_step
+
+        yield lo + 1, None
+
+    def _bisect(self, window, lo, hi):
+        """window[lo] 与 window[hi] 文本不同，返回区间内每次变化的 (偏移, 新文本)"""
+        if hi - lo <= 1:
+            return [(hi, window[hi][1])]
+        mid = (lo + hi) // 2
+        signature, text, band = window[mid]
+        if text is None:
+            window[mid] = self._sample(band, [window[lo], window[hi]], signature)
+            text = window[mid][1]
+
+        changes = []
+        if text != window[lo][1]:
+            changes += self._bisect(window, lo, mid)
+        if text != window[hi][1]:
+            changes += self._bisect(window, mid, hi)
+        return changes
+
+    def _sample(self, band, neighbours, signature=None):
+        """识别一帧，画面与已知帧相同时直接复用其文本，返回 (签名, 文本, 字幕带)"""
+        self.stats['frames_sampled'] += 1
+        if signature is None:
+            signature = self.change_detector.signature(band)
+        for other_signature, other_text, _ in neighbours:
+            if not self.change_detector.differs(signature, other_signature):
+                self.stats['ocr_skipped'] += 1
+                return signature, other_text, band
+        return signature, self.recognize(band), band
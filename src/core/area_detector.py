@@ -0,0 +1,120 @@
+import cv2
+import numpy as np
+
+class SubtitleAreaDetector:
+    """自动检测字幕区域：在整个视频中均匀采样若干帧，找出文字边缘持续密集的横向区域
+
+    字幕的笔画在水平方向产生密集的竖直边缘，且在大部分时间出现在同一高度；
+    画面内容的边缘位置随镜头变化，台标、水印等静态叠加的边缘在每一帧都完全相同，
+    两者都会被排除。返回的区域按行上下留出余量，置信度低时应由用户手动框选。
+    """
+
+    def __init__(self, samples=40, work_width=640, edge_threshold=80, row_density=0.04,
+                 min_presence=0.15, padding=0.3):
+        # 采样帧数
+        self.samples = samples
+        # 检测前把帧缩放到的宽度，分辨率越高边缘越多，缩放后阈值才通用
+        self.work_width = work_width
+        # 水平梯度超过该值的像素视为边缘
+        self.edge_threshold = edge_threshold
+        # 一行中边缘像素占比达到该值视为该帧这一行有文字
+        self.row_density = row_density
+        # 至少在该比例的采样帧中有文字的行才作为候选
+        self.min_presence = min_presence
+        # 上下各扩展区域高度的比例，容纳不同字幕的字形和位置差异
+        self.padding = padding
+
+    def detect(self, video_path):
+        """检测视频的字幕区域，返回 (区域, 置信度)，区域为 (上边界比例, 下边界比例)，未检测到时为 None"""
+        frames = self._sample_frames(video_path)
+        if len(frames) < 3:
+            return None, 0.0
+        return self.detect_frames(frames)
+
+    def detect_frames(self, frames):
+        """在一组灰度帧上检测字幕区域"""
+        edges = np.stack([self._edges(frame) for frame in frames])
+        # 每一帧都在同一位置的边缘属于静态叠加（台标、水印、黑边），字幕内容会变化
+        static = edges.mean(axis=0) >= 0.9
+        edges &= ~static
+        # 各行在多少比例的采样帧中有文字
+        presence = (edges.mean(axis=2) >= self.row_density).mean(axis=0)
+        height = presence.shape[0]
+
+        best = None
+        best_score = 0.0
+        for top, bottom in self._bands(presence, height):
+            score = presence[top:bottom].sum()
+            # 字幕通常在画面下半部分，上方的字幕需要更明显的证据
+            if (top + bottom) / 2 < height / 2:
+                score *= 0.6
+            if score > best_score:
+                best, best_score = (top, bottom), score
+        if best is None:
+            return None, 0.0
+
+        top, bottom = best
+        band_presence = float(presence[top:bottom].mean())
+        margin = int(round((bottom - top) * self.padding))
+        top = max(0, top - margin)
+        bottom = min(height, bottom + margin)
+        outside = np.concatenate([presence[:top], presence[bottom:]])
+        outside_presence = float(outside.mean()) if len(outside) else 0.0
+
+        # 字幕出现得越频繁、与画面其他部分区分越明显，置信度越高
+        separation = max(0.0, 1.0 - outside_presence / band_presence)
+        confidence = min(1.0, band_presence / 0.4) * separation
+        # 过高的区域通常是纹理而不是一行或两行文字
+        if (bottom - top) / height > 0.3:
+            confidence *= 0.5
+        area = (round(top / height, 3), round(bottom / height, 3))
+        return area, round(confidence, 3)
+
+    def _bands(self, presence, height):
+        """候选行连成的纵向区间，间隔很小的区间（多行字幕）合并"""
+        rows = np.flatnonzero(presence >= self.min_presence)
+        if not len(rows):
+            return []
+        max_gap = max(2, height // 25)
+        min_height = max(3, height // 100)
+        bands = []
+        start = previous = int(rows[0])
+        for y in rows[1:]:
+            y = int(y)
+            if y - previous > max_gap:
+                bands.append((start, previous + 1))
+                start = y
+            previous = y
+        bands.append((start, previous + 1))
+        return [(top, bottom) for top, bottom in bands if bottom - top >= min_height]
+
+    def _edges(self, gray):
+        gradient = cv2.convertScaleAbs(cv2.Sobel(gray, cv2.CV_16S, 1, 0, ksize=3))
+        return gradient >= self.edge_threshold
+
+    def _sample_frames(self, video_path):
+        """在视频 5%~95% 的范围内均匀取帧，缩放为灰度图"""
+        cap = cv2.VideoCapture(video_path)
+        frames = []
+        try:
+            if not cap.isOpened():
+                print(f"无法打开视频文件: {video_path}")
+                return frames
+            total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            if total_frames <= 0:
+                return frames
+            positions = np.linspace(total_frames * 0.05, total_frames * 0.95, self.samples)
+            for position in sorted(set(int(p) for p in positions)):
+                cap.set(cv2.CAP_PROP_POS_FRAMES, position)
+                ret, frame = cap.read()
+                if not ret:
+                    continue
+                gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+                if gray.shape[1] > self.work_width:
+                    scale = self.work_width / gray.shape[1]
+                    gray = cv2.resize(gray, (self.work_width, int(round(gray.shape[0] * scale))),
+                                      interpolation=cv2.INTER_AREA)
+                frames.append(gray)
+        finally:
+            cap.release()
+        return frames
@@ -0,0 +1,72 @@
+import cv2
+import numpy as np
+
+# 预处理判断为没有文字的区域，不需要OCR
+BLANK = object()
+
+class BlankRegionFilter:
+    """字幕带是否有文字的快速判断：没有文字的帧不做OCR，直接结束当前字幕
+
+    得分为强水平梯度像素（笔画边缘）的占比，隔行计算，只用 NumPy 向量运算。
+    阈值用开头的帧校准：校准期间所有帧照常OCR，以识别结果是否为空作为标签，
+    两类都攒够样本后取空白帧得分上限和有字帧得分下限之间偏向空白一侧的位置；
+    两类得分重叠（无法可靠区分）时不启用过滤。
+    """
+
+    def __init__(self, calibration_frames=20, min_samples=3, gradient_threshold=60, row_step=2):
+        # 至少观察的已OCR帧数，以及空白帧和有字帧各自的最少样本数
+        self.calibration_frames = calibration_frames
+        self.min_samples = min_samples
+        # 相邻像素灰度差超过该值视为笔画边缘
+        self.gradient_threshold = gradient_threshold
+        self.row_step = row_step
+        # None 表示尚未校准或不启用，所有帧都交给OCR
+        self.threshold = None
+        self.calibrating = True
+        self.blank_scores = []
+        self.text_scores = []
+        # 差分和掩码的缓冲区，尺寸与字幕带一致，每帧复用
+        self.diff = None
+        self.mask = None
+
+    def score(self, gray):
+        """笔画边缘像素的占比"""
+        rows = gray[::self.row_step]
+        if rows.shape[1] < 2:
+            return 0.0
+        self.diff = cv2.absdiff(rows[:, 1:], rows[:, :-1], dst=self._buffer(self.diff, rows))
+        self.mask = cv2.threshold(self.diff, self.gradient_threshold - 1, 255, cv2.THRESH_BINARY,
+                                  dst=self._buffer(self.mask, rows))[1]
+        return cv2.countNonZero(self.mask) / rows.size
+
+    def _buffer(self, buffer, rows):
+        shape = (rows.shape[0], rows.shape[1] - 1)
+        return buffer if buffer is not None and buffer.shape == shape else None
+
+    def is_blank(self, score):
+        return self.threshold is not None and score < self.threshold
+
+    def observe(self, score, has_text):
+        """校准期间记录一个已OCR的帧的得分和识别结果"""
+        if not self.calibrating:
+            return
+        (self.text_scores if has_text else self.blank_scores).append(score)
+        if (len(self.blank_scores) + len(self.text_scores) >= self.calibration_frames
+                and len(self.blank_scores) >= self.min_samples
+                and len(self.text_scores) >= self.min_samples):
+            self._calibrate()
+
+    def _calibrate(self):
+        self.calibrating = False
+        blank_high = float(np.percentile(self.blank_scores, 95))
+        text_low = float(np.percentile(self.text_scores, 5))
+        if blank_high < text_low:
+            # 漏掉字幕的代价比多做一次OCR大，阈值靠近空白帧一侧
+            self.threshold = blank_high + (text_low - blank_high) / 3
+            print(f"空白区域过滤已启用: 阈值 {self.threshold:.4f} "
+                  f"(空白帧 ≤ {blank_high:.4f}, 有字帧 ≥ {text_low:.4f})")
+        else:
+            print(f"空白帧与有字帧的得分重叠，不启用空白区域过滤 "
+                  f"(空白帧 ≤ {blank_high:.4f}, 有字帧 ≥ {text_low:.4f})")
+        self.blank_scores = []
+        self.text_scores = []
@@ -0,0 +1,74 @@
+import json
+import os
+import time
+import uuid
+
+def checkpoint_path(output_path):
+    """检查点文件保存在输出文件旁边"""
+    return f"{output_path}.checkpoint.json"
+
+def write_atomic(path, text):
+    """写入同目录的临时文件后原子替换，进程崩溃时不会留下写了一半的文件"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    try:
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+class Checkpoint:
+    """提取进度检查点：定期保存下一帧的位置、未结束的字幕和已完成的字幕，中断或崩溃后从此处继续"""
+
+    def __init__(self, output_path, video_path, subtitle_area, options, interval=30):
+        self.path = checkpoint_path(output_path)
+        self.interval = interval
+        # 输出文件的写入器，保存其写入位置以便继续追加
+        self.writer = None
+        self.last_save = time.monotonic()
+        # 视频或参数变化后旧的检查点不再有效
+        stat = os.stat(video_path)
+        self.signature = {
+            'video': os.path.abspath(video_path),
+            'size': stat.st_size,
+            'mtime': stat.st_mtime,
+            'subtitle_area': list(subtitle_area) if subtitle_area else None,
+            'options': options
+        }
+
+    def load(self):
+        """读取有效的检查点，不存在或与当前任务不符时返回 None"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if state.get('signature') != self.signature:
+            return None
+        return state
+
+    def save(self, next_frame, assembler):
+        """保存检查点，next_frame 之前的帧都已交给 assembler"""
+        state = dict(assembler.state(), signature=self.signature, frame=next_frame)
+        if self.writer:
+            state['writer'] = self.writer.state()
+        write_atomic(self.path, json.dumps(state, ensure_ascii=False))
+        self.last_save = time.monotonic()
+
+    def maybe_save(self, next_frame, assembler):
+        """距上次保存超过间隔时保存"""
+        if time.monotonic() - self.last_save >= self.interval:
+            self.save(next_frame, assembler)
+
+    def remove(self):
+        """处理完成后删除检查点"""
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
@@ -1,17 +1,102 @@
 import cv2
-import numpy as np
-from paddleocr import PaddleOCR
+import json
 import time
 import os
 import logging
-import subprocess
+import urllib.request
+from .frame_diff import RegionChangeDetector
+from .frame_source import VideoFrameSource
+from .metrics import Metrics
+from .adaptive import AdaptiveSampler, SeekableFrameReader
+from .blank_filter import BLANK, BlankRegionFilter
+from .checkpoint import Checkpoint, write_atomic
+from .ffmpeg_source import FFmpegFrameSource, FFmpegStreamSource, ffmpeg_available
+from .pipeline import Pipeline
+from .preprocess import GRAYSCALE_PROFILES, PROFILES, Preprocessor
+from .ocr_cache import OcrCache
+from .recognizer import BatchRecognizer
+from .roi import area_bounds, ink_columns
+from .subtitles import SubtitleAssembler
+from .urls import is_stream_url
+from .writers import open_writer
+from ..utils.logger import debug, set_debug
 
 # 在文件开头添加颜色常量
 PURPLE = '\033[95m'  # 紫色（亮紫色）
 RESET = '\033[0m'  # 重置颜色
 
 class SubtitleExtractor:
-    def __init__(self):
+    def __init__(self, sample_interval=0.1, skip_unchanged=True, ocr_batch_size=8, cpu_threads=None,
+                 pipeline_depth=8, decoder='opencv', ocr_cache=True, cache_path=None,
+                 sampling='uniform', max_sample_interval=2.0, checkpoint_interval=30,
+                 debug=None, metrics_report=False, ocr_engine=None, detection='model',
+                 tight_crop=False, preprocess='default', blank_filter=True, reuse_buffers=True):
+        # 采样间隔（秒），按时间而不是固定帧数采样
+        self.sample_interval = sample_interval
+        # 字幕区域未变化时跳过OCR，复用上一次的识别结果
+        self.skip_unchanged = skip_unchanged
+        # 单次OCR调用最多拼接的字幕区域数
+        self.ocr_batch_size = ocr_batch_size
+        # 流水线各阶段之间最多缓存的帧数
+        self.pipeline_depth = pipeline_depth
+        # 解码后端: 'opencv' 或 'ffmpeg'（在 ffmpeg 中裁剪、抽帧并转灰度）
+        self.decoder = decoder
+        # 采样方式: 'uniform' 固定间隔；'adaptive' 文本稳定时步长逐步加大到 max_sample_interval，
+        # 文本变化时二分查找准确的变化帧
+        self.sampling = sampling
+        self.max_sample_interval = max_sample_interval
+        # 检查点保存间隔（秒），None 表示不保存；中断或崩溃后再次处理时从检查点继续
+        self.checkpoint_interval = checkpoint_interval
+        # 文本行定位: 'model' 完整的检测+方向分类+识别；'projection' 投影切行后只做识别（单行字幕带更快）
+        self.detection = detection
+        # 每帧把字幕区域横向收缩到有笔画的列，减少二值化和OCR的像素（宽屏视频字幕通常不到一半宽度）
+        self.tight_crop = tight_crop
+        # 预处理方案: default（自适应阈值）/ fast（不二值化）/ color_mask（白字黑边颜色掩码）
+        if preprocess not in PROFILES:
+            raise ValueError(f"未知的预处理方案: {preprocess}，可选: {', '.join(PROFILES)}")
+        if detection == 'projection' and preprocess in GRAYSCALE_PROFILES:
+            raise ValueError(f"投影切行需要二值化的预处理方案，不能与 {preprocess} 同时使用")
+        self.preprocess = preprocess
+        # 用笔画边缘密度快速判断字幕带是否为空，空白帧不做OCR并结束当前字幕（阈值按视频自动校准）
+        self.blank_filter = blank_filter
+        # 解码和灰度转换写入预先分配、循环复用的缓冲区，不再每帧分配内存（4K视频每帧约24MB）
+        self.reuse_buffers = reuse_buffers
+        # 为 True 时在输出文件旁写入 <输出文件>.metrics.json（各阶段耗时和计数）
+        self.metrics_report = metrics_report
+        self.metrics = Metrics()
+        self.stats = {}
+        # 逐帧的详细输出，None 时由环境变量 SUBTITLE_DEBUG 决定
+        if debug is not None:
+            set_debug(debug)
+        
+        # OCR结果缓存，重复处理相同画面时直接复用识别结果
+        self.cache = None
+        if ocr_cache:
+            if cache_path is None:
+                project_root = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+                cache_path = os.path.join(project_root, 'cache', 'ocr_cache.sqlite')
+            try:
+                self.cache = OcrCache(cache_path)
+            except Exception as e:
+                print(f"OCR缓存不可用: {str(e)}")
+        
+        # 多进程并行时限制每个OCR引擎的线程数，避免进程间争抢CPU
+        engine_options = {}
+        if cpu_threads:
+            engine_options['cpu_threads'] = cpu_threads
+        
+        # 传入 ocr_engine 时直接使用（需提供与 PaddleOCR 相同的 ocr(image, cls=True) 接口），
+        # 基准测试等场景不加载模型
+        if ocr_engine is not None:
+            self.ocr = ocr_engine
+        else:
+            self.ocr = self._create_engine(engine_options)
+    
+    def _create_engine(self, engine_options):
+        """创建 PaddleOCR 引擎，本地模型完整时优先使用"""
+        # 首次创建引擎时才导入 PaddleOCR，导入本模块不会加载推理库
+        from paddleocr import PaddleOCR
+        
         # 配置日志级别
         logging.basicConfig(level=logging.WARNING)
         paddleocr_logger = logging.getLogger("paddleocr")
@@ -62,206 +147,469 @@ class SubtitleExtractor:
             
             if all(models_status.values()):
                 print("\n所有模型文件完整，使用本地模型")
-                self.ocr = PaddleOCR(
+                ocr = PaddleOCR(
                     use_angle_cls=True,
                     lang='ch',
                     show_log=True,
                     enable_mkldnn=True,
                     det_model_dir=det_path,
                     rec_model_dir=rec_path,
-                    cls_model_dir=cls_path
+                    cls_model_dir=cls_path,
+                    **engine_options
                 )
             else:
                 print("\n使用默认配置（将使用已下载的模型）")
-                self.ocr = PaddleOCR(
+                ocr = PaddleOCR(
                     use_angle_cls=True,
                     lang='ch',
-                    show_log=True
+                    show_log=True,
+                    **engine_options
                 )
             
             print("OCR引擎初始化成功")
+            return ocr
             
         except Exception as e:
             print(f"初始化失败: {str(e)}")
             print("使用基础配置...")
-            self.ocr = PaddleOCR(
+            return PaddleOCR(
                 use_angle_cls=True,
-                lang='ch'
+                lang='ch',
+                **engine_options
             )
     
-    def extract_subtitles(self, video_path, output_path, lang, subtitle_area, callback=None):
-        """从视频中提取字幕并保存到文本文件"""
+    def extract_subtitles(self, video_path, output_path, lang, subtitle_area, callback=None,
+                          save_stream_to=None, on_cue=None):
+        """从视频中提取字幕，每条字幕完成时立即追加到输出文件
+
+        输出格式由扩展名决定: .srt / .vtt / .jsonl（含置信度和帧号）。
+        video_path 为 http(s) 地址时边下载边识别，save_stream_to 指定时同时保存下载的视频。
+        on_cue(字幕, 附加信息) 在每条字幕完成时被调用，不必等待整个视频处理结束。
+        """
         print(f"开始处理视频: {video_path}")
         
-        cap = cv2.VideoCapture(video_path)
-        if not cap.isOpened():
-            print(f"无法打开视频文件: {video_path}")
-            return
+        checkpoint = None
+        state = None
+        # 网络视频和自适应采样不保存检查点
+        if self.checkpoint_interval and self.sampling == 'uniform' and not is_stream_url(video_path):
+            checkpoint = Checkpoint(output_path, video_path, subtitle_area, self._result_options(),
+                                    self.checkpoint_interval)
+            state = checkpoint.load()
+            # 输出文件比检查点记录的短（被改动过）时无法接着写入，重新开始
+            if state and not (state.get('writer') and os.path.exists(output_path)
+                              and os.path.getsize(output_path) >= state['writer']['offset']):
+                state = None
         
-        fps = cap.get(cv2.CAP_PROP_FPS)
-        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        print(f"视频信息 - FPS: {fps}, 总帧数: {total_frames}")
+        writer = open_writer(output_path, resume=state['writer'] if state else None)
+        if checkpoint:
+            checkpoint.writer = writer
         
-        current_text = ""
-        start_time = 0
-        subtitle_index = 1
-        subtitles = []
-        frame_count = 0
+        def write_cue(cue, info):
+            writer.write(cue, info)
+            if on_cue:
+                on_cue(cue, info)
+        
+        # 字幕直接写入文件，不在内存中保留
+        assembler = SubtitleAssembler(write_cue, keep_cues=False)
+        start_frame = 0
+        if state:
+            assembler.restore(state)
+            start_frame = state['frame']
+            print(f"从检查点继续: 第 {start_frame} 帧，已有 {writer.count} 条字幕")
         
         try:
-            while cap.isOpened():
-                ret, frame = cap.read()
-                if not ret:
-                    break
-                    
-                frame_count += 1
-                
+            self.extract_cues(video_path, subtitle_area, start_frame, callback=callback,
+                              assembler=assembler, save_stream_to=save_stream_to, checkpoint=checkpoint)
+        finally:
+            # 中断或出错时已识别的字幕也已写入文件
+            count = writer.close()
+            if count:
+                print(f"提取到 {count} 条字幕，已保存到: {output_path}")
+            else:
+                print("未提取到任何字幕！")
+                os.remove(output_path)
+        
+        if self.metrics_report:
+            write_atomic(f"{output_path}.metrics.json",
+                         json.dumps(self.stats['metrics'], ensure_ascii=False, indent=2))
+        
+        # 完整处理完成后检查点不再需要
+        if checkpoint and 'error' not in self.stats:
+            checkpoint.remove()
+        
+        if callback:
+            callback(1.0)
+        return self.stats
+    
+    def extract_shard(self, video_path, subtitle_area, start_frame, end_frame, shard_path=None, callback=None):
+        """识别一个分段，返回该范围内的字幕条目
+
+        指定 shard_path 时在其旁边保存分段检查点（包含已识别的字幕），再次处理同一分段时从检查点继续；
+        检查点由合并分段的调用方在完整结果保存后删除。
+        """
+        assembler = SubtitleAssembler()
+        checkpoint = None
+        if shard_path and self.checkpoint_interval and self.sampling == 'uniform':
+            options = dict(self._result_options(), frames=[start_frame, end_frame])
+            checkpoint = Checkpoint(shard_path, video_path, subtitle_area, options, self.checkpoint_interval)
+            state = checkpoint.load()
+            if state:
+                assembler.restore(state)
+                print(f"分段从检查点继续: 第 {state['frame']} 帧，已有 {len(assembler.cues)} 条字幕")
+                start_frame = state['frame']
+        return self.extract_cues(video_path, subtitle_area, start_frame, end_frame, callback=callback,
+                                 assembler=assembler, checkpoint=checkpoint)
+    
+    def _result_options(self):
+        """影响识别结果的参数（与结果库的结果键一致），参数不同时检查点不能接着使用"""
+        return {
+            'sample_interval': self.sample_interval,
+            'skip_unchanged': self.skip_unchanged,
+            'decoder': self.decoder,
+            'sampling': self.sampling,
+            'max_sample_interval': self.max_sample_interval,
+            'detection': self.detection,
+            'tight_crop': self.tight_crop,
+            'preprocess': self.preprocess,
+            'blank_filter': self.blank_filter,
+            'ocr_engine': type(self.ocr).__name__
+        }
+    
+    def extract_cues(self, video_path, subtitle_area, start_frame=0, end_frame=None,
+                     callback=None, assembler=None, save_stream_to=None, checkpoint=None):
+        """识别 [start_frame, end_frame) 范围内的字幕，返回 (开始时间, 结束时间, 文本) 列表
+
+        传入 checkpoint 时定期保存处理位置，结束（包括中断和出错）时再保存一次。
+        """
+        # 网络视频只能顺序读取，不支持自适应采样的回退读取
+        if self.sampling == 'adaptive' and not is_stream_url(video_path):
+            return self._extract_adaptive(video_path, subtitle_area, start_frame, end_frame,
+                                          callback, assembler)
+        
+        source = self._open_source(video_path, subtitle_area, start_frame, end_frame, save_stream_to)
+        if not source.open():
+            source.release()
+            raise IOError(f"无法打开视频文件: {video_path}")
+        
+        fps = source.fps
+        total_frames = source.total_frames
+        print(f"视频信息 - FPS: {fps}, 总帧数: {total_frames}, "
+              f"处理范围: {source.start_frame}-{source.end_frame}, "
+              f"采样间隔: {self.sample_interval}秒")
+        
+        current_time = source.start_frame / fps
+        if assembler is None:
+            assembler = SubtitleAssembler()
+        self.metrics = Metrics()
+        emitted = assembler.emitted
+        recognizer = BatchRecognizer(self.ocr, cache=self.cache, metrics=self.metrics,
+                                     detection=self.detection)
+        # 待识别的采样帧 [(帧序号, 时间戳, 预处理后的区域, 文字得分)]，攒满一批后统一识别
+        pending = []
+        batch_capacity = self.ocr_batch_size
+        
+        change_detector = RegionChangeDetector()
+        blank_filter = BlankRegionFilter() if self.blank_filter else None
+        self.stats = {
+            'frames_sampled': 0,
+            'ocr_skipped': 0,
+            'ocr_blank': 0
+        }
+        
+        # 解码、预处理、识别三个阶段并发执行，阶段之间用有界队列限制内存占用
+        pipeline = Pipeline(self.pipeline_depth)
+        if source.cropped:
+            decoded = pipeline.source('decode', self.metrics.timed(source, 'decode'))
+        else:
+            decoded = pipeline.source('decode', self.metrics.timed((
+                (frame_index, frame_time, self._crop_region(frame, subtitle_area))
+                for frame_index, frame_time, frame in source
+            ), 'decode'))
+        # 颜色掩码等步骤按视频校准，每次处理重新创建
+        preprocessor = Preprocessor(self.preprocess, self.metrics)
+        # 预处理线程复用的中间结果缓冲区
+        workspace = {}
+        preprocessed = pipeline.stage(
+            'preprocess', decoded,
+            lambda item: self._preprocess(item, change_detector, preprocessor, blank_filter, workspace)
+        )
+        
+        # 之前的帧都已交给 assembler 的位置
+        next_frame = source.start_frame
+        try:
+            sampled = 0
+            for frame_index, current_time, binary, text_score in preprocessed:
                 # 更新进度显示
-                if frame_count % 10 == 0:  # 每10帧更新一次
-                    progress = frame_count / total_frames
+                if sampled % 10 == 0:  # 每采样10帧更新一次
+                    progress = source.progress(frame_index)
+                    # 处理过程中也更新各阶段的阻塞统计，供进度回调读取
+                    self.stats['pipeline'] = pipeline.stats()
                     if callback:
                         callback(progress)
-                    print(f"{PURPLE}处理进度: {progress*100:.0f}%{RESET}")  # 紫色显示进度
+                    debug(f"{PURPLE}处理进度: {progress*100:.0f}%{RESET}")  # 紫色显示进度
+                sampled += 1
                 
-                # 每3帧处理一次OCR，提高性能
-                if frame_count % 3 != 0:
+                # 区域未变化的帧不需要识别
+                if binary is None:
+                    if not pending:
+                        next_frame = frame_index + 1
                     continue
-                    
-                current_frame = int(cap.get(cv2.CAP_PROP_POS_FRAMES))
-                current_time = current_frame / fps
-                
-                # 1. 提取字幕区域
-                if subtitle_area:
-                    height = frame.shape[0]
-                    y1 = int(height * subtitle_area[0])  # bottom ratio
-                    y2 = int(height * subtitle_area[1])  # top ratio
-                    subtitle_region = frame[y1:y2, :]
-                    print(f"字幕区域: {y1}-{y2}")
-                else:
-                    subtitle_region = frame
                 
-                # 2. 图像预处理
-                gray = cv2.cvtColor(subtitle_region, cv2.COLOR_BGR2GRAY)
-                # 使用自适应阈值
-                binary = cv2.adaptiveThreshold(
-                    gray,
-                    255,
-                    cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
-                    cv2.THRESH_BINARY,
-                    11,
-                    2
-                )
-                # 添加一些图像增强
-                kernel = np.ones((1, 1), np.uint8)
-                binary = cv2.dilate(binary, kernel, iterations=1)
-                binary = cv2.erode(binary, kernel, iterations=1)
-                
-                try:
-                    # 3. OCR识别
-                    result = self.ocr.ocr(binary, cls=True)
-                    
-                    # 4. 提取文本
-                    text = ""
-                    if result:
-                        for line in result:
-                            try:
-                                # 处理单个文本框的情况
-                                if isinstance(line, list) and len(line) >= 2:
-                                    # 直接获取文本和置信度
-                                    text_info = line[1]
-                                    if isinstance(text_info, tuple):
-                                        text_content, confidence = text_info
-                                        if confidence > 0.5:
-                                            text += text_content + " "
-                                            print(f"识别文本: {text_content} (置信度: {confidence})")
-                                # 处理多个文本框的情况
-                                elif isinstance(line, list):
-                                    for box_text in line:
-                                        if isinstance(box_text, list) and len(box_text) >= 2:
-                                            text_info = box_text[1]
-                                            if isinstance(text_info, tuple):
-                                                text_content, confidence = text_info
-                                                if confidence > 0.5:
-                                                    text += text_content + " "
-                                                    print(f"识别文本: {text_content} (置信度: {confidence})")
-                            except Exception as e:
-                                print(f"处理OCR结果出错: {str(e)}, line={line}")
-                                continue
-                        
-                        text = text.strip()
-                        if text:
-                            print(f"最终文本: {text}")
-                            
-                            # 5. 处理字幕
-                            if text != current_text:
-                                if current_text:
-                                    # 添加当前字幕
-                                    end_time = current_time - 0.1
-                                    subtitle = self._format_subtitle(
-                                        subtitle_index,
-                                        start_time,
-                                        end_time,
-                                        current_text
-                                    )
-                                    subtitles.append(subtitle)
-                                    subtitle_index += 1
-                                    print(f"添加字幕: {subtitle}")
-                                
-                                # 开始新字幕
-                                current_text = text
-                                start_time = current_time
-                    
-                except Exception as e:
-                    print(f"OCR处理失败: {str(e)}, result={result}")
+                # 没有文字的帧直接结束当前字幕；前面还有待识别的帧时排在它们之后处理
+                if binary is BLANK and not pending:
+                    assembler.clear(current_time, frame_index=frame_index)
+                    next_frame = frame_index + 1
                     continue
+                
+                # 3. 加入待识别批次，攒满后批量OCR
+                if not pending:
+                    batch_capacity = recognizer.capacity(binary.shape, self.ocr_batch_size)
+                pending.append((frame_index, current_time, binary, text_score))
+                if len(pending) >= batch_capacity:
+                    self._recognize_batch(recognizer, pending, assembler, blank_filter, change_detector)
+                    next_frame = frame_index + 1
+                    if checkpoint:
+                        checkpoint.maybe_save(next_frame, assembler)
+            
+            # 网络视频下载中断时解码会提前结束，已识别的字幕不是完整结果
+            if getattr(source, 'error', None):
+                raise IOError(source.error)
                     
+        except InterruptedError:
+            # 用户中断：保留已识别的字幕后继续向上抛出
+            print("视频处理被中断")
+            raise
         except Exception as e:
             print(f"视频处理失败: {str(e)}")
+            # 已识别的部分仍会保存，但不是完整结果
+            self.stats['error'] = str(e)
         finally:
-            # 处理后一条字幕
-            if current_text:
-                subtitle = self._format_subtitle(
-                    subtitle_index,
-                    start_time,
-                    current_time,
-                    current_text
-                )
-                subtitles.append(subtitle)
+            pipeline.close()
+            # 识别剩余的批次并结束最后一条字幕
+            if pending:
+                self._recognize_batch(recognizer, pending, assembler, blank_filter, change_detector)
+                next_frame = frame_index + 1
+            if checkpoint:
+                checkpoint.save(next_frame, assembler)
+            assembler.finish(current_time, next_frame)
+            source.release()
             
-            # 保存字幕文件
-            if subtitles:
-                print(f"提取到 {len(subtitles)} 条字幕，正在保存...")
-                # 确保输出目录存在
-                output_dir = os.path.dirname(output_path)
-                if output_dir:
-                    os.makedirs(output_dir, exist_ok=True)
-                
-                try:
-                    print(f"准备保存字幕到: {output_path}")
-                    with open(output_path, 'w', encoding='utf-8') as f:
-                        content = '\n\n'.join(subtitles)
-                        f.write(content)
-                        print(f"写入内容长度: {len(content)} 字节")
-                    
-                    if os.path.exists(output_path):
-                        size = os.path.getsize(output_path)
-                        print(f"文件创建成功，大小: {size} 字节")
-                        if size == 0:
-                            print("告：文件大小为0！")
-                            print("字幕内容:", subtitles)  # 打印字幕内容以便调试
-                except Exception as e:
-                    print(f"存字幕文件时出错: {str(e)}")
-                    print("尝试保存的字幕内容:", subtitles)  # 打印字幕内容以便调试
-            else:
-                print("未提取到任何字幕！")
-            
-            cap.release()
+            self.stats.update(recognizer.stats)
+            looked_up = self.stats['cache_hits'] + self.stats['ocr_regions']
+            self.stats['cache_hit_rate'] = self.stats['cache_hits'] / looked_up if looked_up else 0.0
+            self.stats['pipeline'] = pipeline.stats()
+            self.stats['metrics'] = self._metrics_report(assembler.emitted - emitted)
+            print(f"OCR调用: {self.stats['ocr_calls']} 次 (识别区域 {self.stats['ocr_regions']} 个)，"
+                  f"区域未变化跳过: {self.stats['ocr_skipped']} 次，"
+                  f"空白跳过: {self.stats['ocr_blank']} 次，"
+                  f"缓存命中: {self.stats['cache_hits']} 次 ({self.stats['cache_hit_rate']*100:.0f}%)")
+            print(f"流水线阻塞统计: {self.stats['pipeline']}")
+        
+        return assembler.cues
+    
+    def _extract_adaptive(self, video_path, subtitle_area, start_frame, end_frame, callback, assembler):
+        """自适应采样模式：文本稳定时大步前进，变化时二分查找准确的变化帧"""
+        reader = SeekableFrameReader(video_path, lambda frame: self._crop_region(frame, subtitle_area))
+        if not reader.open(start_frame):
+            raise IOError(f"无法打开视频文件: {video_path}")
+        
+        fps = reader.fps
+        if end_frame is None or end_frame > reader.total_frames > 0:
+            end_frame = reader.total_frames
+        print(f"视频信息 - FPS: {fps}, 总帧数: {reader.total_frames}, "
+              f"处理范围: {start_frame}-{end_frame}, "
+              f"自适应采样: {self.sample_interval}-{self.max_sample_interval}秒")
+        
+        if assembler is None:
+            assembler = SubtitleAssembler()
+        self.metrics = Metrics()
+        emitted = assembler.emitted
+        recognizer = BatchRecognizer(self.ocr, cache=self.cache, metrics=self.metrics,
+                                     detection=self.detection)
+        preprocessor = Preprocessor(self.preprocess, self.metrics)
+        blank_filter = BlankRegionFilter() if self.blank_filter else None
+        blank_frames = [0]
+        # 文本 -> 识别置信度，字幕变化帧确定后取出交给 assembler
+        confidences = {}
+
+        def recognize(gray):
+            # 判断为没有文字的帧不做OCR，返回空文本，由调用处结束当前字幕（assembler.clear）
+            text_score = blank_filter.score(gray) if blank_filter else None
+            if text_score is not None and blank_filter.is_blank(text_score):
+                blank_frames[0] += 1
+                return ""
+            text, confidence = recognizer.recognize([preprocessor(*self._tighten(gray))], with_confidence=True)[0]
+            if text is None:
+                # OCR调用失败：按没有文字处理（结果不会写入缓存，再次处理时重新识别）
+                return ""
+            if text_score is not None:
+                blank_filter.observe(text_score, bool(text))
+            if confidence is not None:
+                confidences[text] = max(confidences.get(text, 0.0), confidence)
+            return text
+
+        sampler = AdaptiveSampler(
+            reader,
+            recognize,
+            RegionChangeDetector(),
+            int(round(self.sample_interval * fps)),
+            int(round(self.max_sample_interval * fps))
+        )
+        
+        end_time = start_frame / fps
+        error = None
+        try:
+            for frame_index, text in sampler.run(start_frame, end_frame, callback):
+                end_time = frame_index / fps
+                if text is None:
+                    break
+                # 变化帧已精确定位，上一条字幕在此帧结束
+                if text:
+                    debug(f"最终文本: {text}")
+                    assembler.feed(end_time, text, end_time=end_time, confidence=confidences.pop(text, None),
+                                   frame_index=frame_index)
+                else:
+                    # 字幕在此帧消失
+                    assembler.clear(end_time, end_time=end_time, frame_index=frame_index)
+        except InterruptedError:
+            print("视频处理被中断")
+            raise
+        except Exception as e:
+            print(f"视频处理失败: {str(e)}")
+            error = str(e)
+        finally:
+            assembler.finish(end_time, int(round(end_time * fps)))
+            reader.release()
             
-            if callback:
-                callback(1.0)
+            self.stats = dict(sampler.stats, ocr_blank=blank_frames[0])
+            if error:
+                self.stats['error'] = error
+            self.stats.update(recognizer.stats)
+            self.stats['metrics'] = self._metrics_report(assembler.emitted - emitted)
+            print(f"OCR调用: {self.stats['ocr_calls']} 次，采样: {self.stats['frames_sampled']} 帧，"
+                  f"二分定位: {self.stats['bisections']} 次")
+        
+        return assembler.cues
+    
+    def _metrics_report(self, cues_emitted):
+        """本次运行的计数器和各阶段耗时"""
+        for name in ('frames_sampled', 'ocr_skipped', 'ocr_blank', 'ocr_calls', 'ocr_regions', 'ocr_failed',
+                     'cache_hits'):
+            self.metrics.count(name, self.stats.get(name, 0))
+        self.metrics.count('cues_emitted', cues_emitted)
+        return self.metrics.report()
+    
+    def close(self):
+        """释放OCR缓存等资源"""
+        if self.cache:
+            self.cache.close()
+            self.cache = None
+    
+    def _open_source(self, video_path, subtitle_area, start_frame, end_frame, save_stream_to=None):
+        """根据配置创建帧源，ffmpeg 不可用时回退到 OpenCV"""
+        if is_stream_url(video_path):
+            # 网络视频：下载的数据直接送入 ffmpeg 解码，不等待下载完成
+            if not ffmpeg_available():
+                raise IOError("处理网络视频需要 ffmpeg")
+            response = urllib.request.urlopen(video_path, timeout=30)
+            content_length = int(response.headers.get('Content-Length') or 0)
+            return FFmpegStreamSource(response, self.sample_interval, subtitle_area,
+                                      save_stream_to, content_length, buffers=self._frame_buffers())
+        if self.decoder == 'ffmpeg':
+            if ffmpeg_available():
+                return FFmpegFrameSource(video_path, self.sample_interval, start_frame, end_frame, subtitle_area,
+                                         buffers=self._frame_buffers())
+            print("未找到 ffmpeg，使用 OpenCV 解码")
+        return VideoFrameSource(video_path, self.sample_interval, start_frame, end_frame,
+                                buffers=self._frame_buffers())
+
+    def _frame_buffers(self):
+        """帧源复用的缓冲区个数上限：解码队列深度，加上正在入队、预处理和解码的帧，再留一个余量"""
+        return self.pipeline_depth + 4 if self.reuse_buffers else 0
+    
+    def _crop_region(self, frame, subtitle_area):
+        """1. 提取字幕区域，subtitle_area 为 (上, 下) 或 (x1, y1, x2, y2) 比例"""
+        if not subtitle_area:
+            return frame
+        height, width = frame.shape[:2]
+        x1, y1, x2, y2 = area_bounds(subtitle_area, width, height)
+        debug(f"字幕区域: ({x1}, {y1}) - ({x2}, {y2})")
+        return frame[y1:y2, x1:x2]
+
+    def _tighten(self, gray, region=None):
+        """横向收缩到有笔画的列，返回 (灰度区域, 原始区域)；没有笔画时保留整个区域"""
+        if region is None:
+            region = gray
+        if not self.tight_crop:
+            return gray, region
+        columns = ink_columns(gray)
+        if columns is None:
+            return gray, region
+        return gray[:, columns[0]:columns[1]], region[:, columns[0]:columns[1]]
+    
+    def _preprocess(self, item, change_detector, preprocessor, blank_filter=None, workspace=None):
+        """2. 图像预处理，返回 (帧序号, 时间戳, 区域, 文字得分)
+
+        区域与上一次OCR的区域相同时区域为 None，判断为没有文字时为 BLANK。
+        """
+        start = time.perf_counter()
+        frame_index, current_time, subtitle_region = item
+        if subtitle_region.ndim == 2:
+            # ffmpeg 帧源已输出灰度图
+            gray = subtitle_region
+        else:
+            gray = cv2.cvtColor(subtitle_region, cv2.COLOR_BGR2GRAY,
+                                dst=workspace.get('gray') if workspace is not None else None)
+            if workspace is not None and self.reuse_buffers:
+                workspace['gray'] = gray
+        self.stats['frames_sampled'] += 1
+        
+        # 区域与上一次OCR的区域相同，识别结果不会变化，直接跳过
+        changed, signature = change_detector.check(gray)
+        if self.skip_unchanged and not changed:
+            self.stats['ocr_skipped'] += 1
+            self.metrics.observe('preprocess', time.perf_counter() - start)
+            return frame_index, current_time, None, None
+        # 空白帧也要记录签名，字幕消失后再出现相同文本时才会重新识别
+        change_detector.update(signature)
+
+        text_score = None
+        if blank_filter:
+            text_score = blank_filter.score(gray)
+            if blank_filter.is_blank(text_score):
+                self.stats['ocr_blank'] += 1
+                self.metrics.observe('preprocess', time.perf_counter() - start)
+                return frame_index, current_time, BLANK, text_score
+        binary = preprocessor(*self._tighten(gray, subtitle_region))
+        self.metrics.observe('preprocess', time.perf_counter() - start)
+        return frame_index, current_time, binary, text_score
     
-    def _format_subtitle(self, index, start_time, end_time, text):
-        """格式化为SRT格式字幕"""
-        start_str = time.strftime('%H:%M:%S,', time.gmtime(start_time)) + f'{int((start_time % 1) * 1000):03d}'
-        end_str = time.strftime('%H:%M:%S,', time.gmtime(end_time)) + f'{int((end_time % 1) * 1000):03d}'
-        return f"{index}\n{start_str} --> {end_str}\n{text}\n"
\ No newline at end of file
+    def _recognize_batch(self, recognizer, pending, assembler, blank_filter=None, change_detector=None):
+        """批量识别待处理的区域，按时间顺序把结果交给字幕组装"""
+        if not pending:
+            return
+        results = iter(recognizer.recognize(
+            [region for _, _, region, _ in pending if region is not BLANK], with_confidence=True
+        ))
+        with self.metrics.timer('postprocess'):
+            for frame_index, current_time, region, text_score in pending:
+                if region is BLANK:
+                    assembler.clear(current_time, frame_index=frame_index)
+                    continue
+                text, confidence = next(results)
+                if text is None:
+                    # OCR调用失败，这一帧不改变当前字幕；清空区域签名，之后相同的画面重新识别
+                    if change_detector:
+                        change_detector.reset()
+                    continue
+                if blank_filter and text_score is not None:
+                    # 校准期间用识别结果作为空白判断的标签
+                    blank_filter.observe(text_score, bool(text))
+                if not text:
+                    # 识别为空与判断为空白相同，结束当前字幕（空白过滤校准前或未启用时走这里）
+                    assembler.clear(current_time, frame_index=frame_index)
+                    continue
+                debug(f"最终文本: {text}")
+                # 4. 处理字幕
+                assembler.feed(current_time, text, confidence=confidence, frame_index=frame_index)
+        pending.clear()
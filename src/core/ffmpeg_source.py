@@ -0,0 +1,265 @@
+import http.client
+import queue
+import re
+import shutil
+import subprocess
+import threading
+import cv2
+import numpy as np
+from .frame_source import BufferPool
+from .roi import area_bounds, normalize_area
+
+def ffmpeg_available(ffmpeg='ffmpeg'):
+    """检查 ffmpeg 可执行文件是否存在"""
+    return shutil.which(ffmpeg) is not None
+
+class FFmpegFrameSource:
+    """ffmpeg 解码帧源：裁剪、抽帧和灰度转换都在 ffmpeg 中完成，只有采样后的字幕带进入 Python
+
+    产出的帧是已裁剪的灰度图 (cropped = True)，直接由管道数据 frombuffer 得到，不再复制。
+    """
+
+    cropped = True
+
+    def __init__(self, video_path, sample_interval=0.1, start_frame=0, end_frame=None,
+                 subtitle_area=None, ffmpeg='ffmpeg', buffers=0):
+        self.video_path = video_path
+        self.sample_interval = sample_interval
+        self.start_frame = start_frame
+        self.end_frame = end_frame
+        self.subtitle_area = subtitle_area
+        self.ffmpeg = ffmpeg
+        # 复用的帧缓冲区个数上限，0 表示每帧重新分配
+        self.buffers = BufferPool(buffers) if buffers else None
+        self.process = None
+        self.fps = 0
+        self.total_frames = 0
+        self.frame_step = 1
+        self.width = 0
+        self.height = 0
+
+    def open(self):
+        """读取视频信息并启动 ffmpeg 解码进程"""
+        cap = cv2.VideoCapture(self.video_path)
+        if not cap.isOpened():
+            return False
+        self.fps = cap.get(cv2.CAP_PROP_FPS) or 25.0
+        self.total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        frame_width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        frame_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        cap.release()
+
+        if self.end_frame is None or self.end_frame > self.total_frames > 0:
+            self.end_frame = self.total_frames
+        # select 滤镜按帧号抽帧，步长取整数帧，帧号可以精确换算
+        self.frame_step = max(1, int(round(self.sample_interval * self.fps)))
+
+        # 与 SubtitleExtractor._crop_region 相同的取整方式
+        x1, y1, x2, y2 = area_bounds(self.subtitle_area, frame_width, frame_height)
+        self.width = x2 - x1
+        self.height = y2 - y1
+
+        filters = [
+            f"crop={self.width}:{self.height}:{x1}:{y1}",
+            f"select='not(mod(n\\,{self.frame_step}))'",
+            "format=gray"
+        ]
+        command = [self.ffmpeg, '-nostdin', '-loglevel', 'error']
+        if self.start_frame > 0:
+            command += ['-ss', f"{self.start_frame / self.fps:.3f}"]
+        command += ['-i', self.video_path]
+        if self.end_frame:
+            command += ['-t', f"{(self.end_frame - self.start_frame) / self.fps:.3f}"]
+        command += ['-vf', ','.join(filters), '-vsync', '0',
+                    '-f', 'rawvideo', '-pix_fmt', 'gray', '-']
+
+        self.process = subprocess.Popen(
+            command,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            bufsize=self.width * self.height * 4
+        )
+        return True
+
+    def __iter__(self):
+        """依次产出 (帧序号, 时间戳, 灰度字幕带)"""
+        frame_size = self.width * self.height
+        frame_index = self.start_frame
+        while True:
+            if self.buffers:
+                frame = self.buffers.array((self.height, self.width))
+                if self.process.stdout.readinto(memoryview(frame.reshape(-1))) < frame_size:
+                    break
+            else:
+                data = self.process.stdout.read(frame_size)
+                if len(data) < frame_size:
+                    break
+                frame = np.frombuffer(data, np.uint8).reshape(self.height, self.width)
+            if self.end_frame and frame_index >= self.end_frame:
+                break
+            yield frame_index, frame_index / self.fps, frame
+            frame_index += self.frame_step
+
+    def progress(self, frame_index):
+        """处理范围内的进度"""
+        if not self.end_frame:
+            return 0.0
+        return (frame_index - self.start_frame) / max(self.end_frame - self.start_frame, 1)
+
+    def release(self):
+        """结束 ffmpeg 进程"""
+        if self.process:
+            if self.process.poll() is None:
+                self.process.kill()
+            self.process.stdout.close()
+            self.process.wait()
+            self.process = None
+
+class FFmpegStreamSource:
+    """边接收边解码的帧源：输入流（如HTTP下载）经 stdin 管道送入 ffmpeg，不必等待下载完成
+
+    帧尺寸和时间戳由 showinfo 滤镜输出到 stderr 解析得到；可选同时把收到的数据保存为文件。
+    """
+
+    cropped = True
+
+    def __init__(self, stream, sample_interval=0.1, subtitle_area=None, save_to=None,
+                 content_length=None, ffmpeg='ffmpeg', buffers=0):
+        self.stream = stream
+        self.sample_interval = sample_interval
+        self.subtitle_area = subtitle_area
+        self.save_to = save_to
+        self.content_length = content_length
+        self.ffmpeg = ffmpeg
+        self.buffers = BufferPool(buffers) if buffers else None
+        self.process = None
+        self.fps = 0
+        self.total_frames = 0
+        self.start_frame = 0
+        self.end_frame = None
+        self.bytes_received = 0
+        # 下载中断（超时、连接被重置、数据不完整）时的错误信息，此时解码出的帧不是完整视频
+        self.error = None
+        self.closing = False
+        self.frames = queue.Queue()
+        self.header_ready = threading.Event()
+        self.threads = []
+
+    def open(self):
+        """启动 ffmpeg，等待其解析出输入流信息"""
+        filters = []
+        if self.subtitle_area:
+            # 与 SubtitleExtractor._crop_region 相同的取整方式
+            x1, y1, x2, y2 = normalize_area(self.subtitle_area)
+            filters.append(f"crop=trunc(iw*{x2})-trunc(iw*{x1}):trunc(ih*{y2})-trunc(ih*{y1})"
+                           f":trunc(iw*{x1}):trunc(ih*{y1})")
+        # 每个采样间隔内取第一帧
+        interval = self.sample_interval
+        filters += [
+            f"select='isnan(prev_selected_t)+gte(floor(t/{interval})\\,floor(prev_selected_t/{interval})+1)'",
+            "showinfo",
+            "format=gray"
+        ]
+        command = [self.ffmpeg, '-nostats', '-loglevel', 'info', '-i', 'pipe:0',
+                   '-vf', ','.join(filters), '-vsync', '0',
+                   '-f', 'rawvideo', '-pix_fmt', 'gray', 'pipe:1']
+        self.process = subprocess.Popen(
+            command,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE
+        )
+        for target in (self._feed, self._parse_log):
+            thread = threading.Thread(target=target, daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+        self.header_ready.wait()
+        return self.fps > 0
+
+    def __iter__(self):
+        """依次产出 (帧序号, 时间戳, 灰度字幕带)"""
+        while True:
+            info = self.frames.get()
+            if info is None:
+                break
+            frame_time, width, height = info
+            if self.buffers:
+                frame = self.buffers.array((height, width))
+                if self.process.stdout.readinto(memoryview(frame.reshape(-1))) < width * height:
+                    break
+            else:
+                data = self.process.stdout.read(width * height)
+                if len(data) < width * height:
+                    break
+                frame = np.frombuffer(data, np.uint8).reshape(height, width)
+            yield int(round(frame_time * self.fps)), frame_time, frame
+
+    def progress(self, frame_index):
+        """按已接收的字节数估算进度"""
+        if not self.content_length:
+            return 0.0
+        return min(self.bytes_received / self.content_length, 1.0)
+
+    def release(self):
+        """结束 ffmpeg 进程并关闭输入流"""
+        self.closing = True
+        if self.process:
+            if self.process.poll() is None:
+                self.process.kill()
+            self.process.stdout.close()
+            self.process.wait()
+            self.process = None
+        self.stream.close()
+
+    def _feed(self):
+        """把输入流写入 ffmpeg 的 stdin，同时可选地保存到文件"""
+        output = open(self.save_to, 'wb') if self.save_to else None
+        try:
+            while True:
+                try:
+                    chunk = self.stream.read(65536)
+                except (OSError, ValueError, http.client.HTTPException) as e:
+                    # 主动关闭流（处理结束或中断）时的读取错误不算下载失败
+                    if not self.closing:
+                        self.error = f"视频下载中断: {str(e) or type(e).__name__}"
+                    break
+                if not chunk:
+                    if self.content_length and self.bytes_received < self.content_length:
+                        self.error = f"视频下载不完整: {self.bytes_received}/{self.content_length} 字节"
+                    break
+                self.bytes_received += len(chunk)
+                if output:
+                    output.write(chunk)
+                try:
+                    self.process.stdin.write(chunk)
+                except (BrokenPipeError, OSError, ValueError):
+                    # ffmpeg 已退出
+                    break
+        finally:
+            if output:
+                output.close()
+            try:
+                self.process.stdin.close()
+            except (BrokenPipeError, OSError):
+                pass
+
+    def _parse_log(self):
+        """解析 ffmpeg 日志：输入帧率和每个输出帧的尺寸、时间戳"""
+        fps_pattern = re.compile(r'Stream #\d+:\d+.*Video:.*?([\d.]+) (?:fps|tbr)')
+        frame_pattern = re.compile(r'pts_time:\s*([\d.]+).*?\ss:(\d+)x(\d+)')
+        try:
+            for line in iter(self.process.stderr.readline, b''):
+                line = line.decode('utf-8', 'replace')
+                if not self.header_ready.is_set():
+                    match = fps_pattern.search(line)
+                    if match:
+                        self.fps = float(match.group(1))
+                        self.header_ready.set()
+                    continue
+                match = frame_pattern.search(line)
+                if match:
+                    self.frames.put((float(match.group(1)), int(match.group(2)), int(match.group(3))))
+        finally:
+            self.header_ready.set()
+            self.frames.put(None)
@@ -0,0 +1,39 @@
+import cv2
+import numpy as np
+
+class RegionChangeDetector:
+    """字幕区域变化检测：区域未变化时复用上一次的OCR结果"""
+
+    def __init__(self, signature_size=(160, 24), pixel_threshold=40, change_ratio=0.01):
+        # 签名尺寸 (宽, 高)，缩小后比较可以忽略压缩噪声
+        self.signature_size = signature_size
+        # 单个像素灰度差超过该值视为变化
+        self.pixel_threshold = pixel_threshold
+        # 变化像素占比超过该值视为区域变化
+        self.change_ratio = change_ratio
+        self.last_signature = None
+
+    def reset(self):
+        """清空上一次识别的区域签名"""
+        self.last_signature = None
+
+    def signature(self, gray):
+        """计算灰度区域的缩略签名"""
+        return cv2.resize(gray, self.signature_size, interpolation=cv2.INTER_AREA)
+
+    def check(self, gray):
+        """判断区域相对上一次OCR的区域是否发生变化，返回 (是否变化, 签名)"""
+        signature = self.signature(gray)
+        if self.last_signature is None:
+            return True, signature
+        return self.differs(signature, self.last_signature), signature
+
+    def differs(self, signature, other):
+        """比较两个签名是否有明显差异"""
+        diff = cv2.absdiff(signature, other)
+        changed = np.count_nonzero(diff > self.pixel_threshold)
+        return changed > diff.size * self.change_ratio
+
+    def update(self, signature):
+        """记录本次OCR的区域签名"""
+        self.last_signature = signature
@@ -0,0 +1,103 @@
+import sys
+import cv2
+import numpy as np
+
+class BufferPool:
+    """按需复用的帧缓冲区
+
+    取缓冲区时选一个已不再被引用的（流水线中已没有这一帧，包括裁剪出的视图），
+    解码直接写入其中；都在使用中时才分配新的，数量最多为 limit 个。缓冲区个数随
+    实际同时在流水线中的帧数增长，解码较慢、队列经常为空时只需要两三个。
+    """
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.buffers = []
+
+    def acquire(self, shape=None):
+        """取出一个空闲的缓冲区，没有时返回 None"""
+        for buffer in self.buffers:
+            # 引用只来自缓冲区列表、循环变量和 getrefcount 的参数
+            if sys.getrefcount(buffer) <= 3 and (shape is None or buffer.shape == shape):
+                return buffer
+        return None
+
+    def add(self, buffer):
+        """登记新分配的缓冲区，超过上限时不再登记（该帧用完即释放）"""
+        if len(self.buffers) < self.limit and not any(buffer is other for other in self.buffers):
+            self.buffers.append(buffer)
+
+    def array(self, shape):
+        """取出指定尺寸的空闲缓冲区，没有时分配新的"""
+        buffer = self.acquire(shape)
+        if buffer is None:
+            buffer = np.empty(shape, np.uint8)
+            self.add(buffer)
+        return buffer
+
+class VideoFrameSource:
+    """按时间间隔采样的帧源：不需要的帧只 grab() 不解码，采样帧才 retrieve()"""
+
+    # 产出完整的BGR帧，由调用方裁剪字幕区域
+    cropped = False
+
+    def __init__(self, video_path, sample_interval=0.1, start_frame=0, end_frame=None, buffers=0):
+        self.video_path = video_path
+        # 采样间隔（秒），不同帧率的视频得到相同的时间精度
+        self.sample_interval = sample_interval
+        # 处理范围 [start_frame, end_frame)，用于分段并行处理
+        self.start_frame = start_frame
+        self.end_frame = end_frame
+        self.cap = None
+        self.fps = 0
+        self.total_frames = 0
+        self.frame_step = 1.0
+        # 复用的帧缓冲区个数上限，0 表示每帧重新分配
+        self.buffers = BufferPool(buffers) if buffers else None
+
+    def open(self):
+        """打开视频、定位到起始帧并计算采样步长"""
+        self.cap = cv2.VideoCapture(self.video_path)
+        if not self.cap.isOpened():
+            return False
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 25.0
+        self.total_frames = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        if self.end_frame is None or self.end_frame > self.total_frames > 0:
+            self.end_frame = self.total_frames
+        if self.start_frame > 0:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, self.start_frame)
+        # 保留小数步长，累计后不会因取整产生时间漂移
+        self.frame_step = max(1.0, self.sample_interval * self.fps)
+        return True
+
+    def __iter__(self):
+        """依次产出 (帧序号, 时间戳, 帧)"""
+        frame_index = self.start_frame - 1
+        next_sample = float(self.start_frame)
+        while self.cap.grab():
+            frame_index += 1
+            if self.end_frame and frame_index >= self.end_frame:
+                break
+            if frame_index < next_sample:
+                continue
+            if self.buffers:
+                ret, frame = self.cap.retrieve(self.buffers.acquire())
+                self.buffers.add(frame)
+            else:
+                ret, frame = self.cap.retrieve()
+            if not ret:
+                break
+            next_sample += self.frame_step
+            yield frame_index, frame_index / self.fps, frame
+
+    def progress(self, frame_index):
+        """处理范围内的进度"""
+        if not self.end_frame:
+            return 0.0
+        return (frame_index - self.start_frame) / max(self.end_frame - self.start_frame, 1)
+
+    def release(self):
+        """释放视频资源"""
+        if self.cap:
+            self.cap.release()
+            self.cap = None
@@ -0,0 +1,123 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# 耗时直方图的桶上限（秒）
+TIME_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class Histogram:
+    """固定分桶的直方图，各桶计数不累加，导出 Prometheus 格式时再累加"""
+
+    def __init__(self, bounds=TIME_BUCKETS):
+        self.bounds = tuple(bounds)
+        # 最后一个桶对应 +Inf
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def merge(self, data):
+        """合并另一个直方图的 to_dict() 结果（分桶必须相同）"""
+        if tuple(data['bounds']) != self.bounds:
+            return
+        for i, count in enumerate(data['counts']):
+            self.counts[i] += count
+        self.count += data['count']
+        self.sum += data['sum']
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'sum': round(self.sum, 6),
+            'mean': round(self.sum / self.count, 6) if self.count else 0.0,
+            'bounds': list(self.bounds),
+            'counts': list(self.counts)
+        }
+
+class Metrics:
+    """处理过程的计数器和各阶段耗时直方图，可导出为JSON报告或 Prometheus 文本格式"""
+
+    def __init__(self):
+        self.counters = {}
+        self.histograms = {}
+        self.lock = threading.Lock()
+
+    def count(self, name, value=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name, seconds):
+        with self.lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.observe(seconds)
+
+    @contextmanager
+    def timer(self, name):
+        """记录代码块耗时到名为 name 的直方图"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def timed(self, iterable, name):
+        """逐个取出 iterable 的数据，每次取数据的耗时记录到 name 直方图"""
+        iterator = iter(iterable)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            self.observe(name, time.perf_counter() - start)
+            yield item
+
+    def report(self):
+        """可序列化为JSON的报告"""
+        with self.lock:
+            return {
+                'counters': dict(self.counters),
+                'histograms': {name: histogram.to_dict() for name, histogram in self.histograms.items()}
+            }
+
+    def merge(self, report):
+        """累加另一份 report()，用于汇总多个进程或多次运行"""
+        if not report:
+            return
+        with self.lock:
+            for name, value in report.get('counters', {}).items():
+                self.counters[name] = self.counters.get(name, 0) + value
+            for name, data in report.get('histograms', {}).items():
+                histogram = self.histograms.get(name)
+                if histogram is None:
+                    histogram = self.histograms[name] = Histogram(data['bounds'])
+                histogram.merge(data)
+
+    def to_prometheus(self, prefix='subtitle_extractor'):
+        """导出为 Prometheus 文本格式：计数器为 <prefix>_<名称>_total，耗时为 <prefix>_stage_seconds{stage=...}"""
+        lines = []
+        with self.lock:
+            for name in sorted(self.counters):
+                metric = f"{prefix}_{name}_total"
+                lines.append(f"# TYPE {metric} counter")
+                lines.append(f"{metric} {self.counters[name]}")
+
+            metric = f"{prefix}_stage_seconds"
+            if self.histograms:
+                lines.append(f"# TYPE {metric} histogram")
+            for name in sorted(self.histograms):
+                histogram = self.histograms[name]
+                cumulative = 0
+                for bound, count in zip(histogram.bounds + ('+Inf',), histogram.counts):
+                    cumulative += count
+                    lines.append(f'{metric}_bucket{{stage="{name}",le="{bound}"}} {cumulative}')
+                lines.append(f'{metric}_sum{{stage="{name}"}} {histogram.sum:.6f}')
+                lines.append(f'{metric}_count{{stage="{name}"}} {histogram.count}')
+        return "\n".join(lines) + "\n"
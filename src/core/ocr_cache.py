@@ -0,0 +1,97 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+class OcrCache:
+    """OCR结果缓存：以预处理后字幕区域的内容指纹为键，保存识别出的 (文本, 置信度) 列表
+
+    内存中按LRU淘汰，同时写入SQLite文件，跨进程、跨运行复用。
+    """
+
+    def __init__(self, path, capacity=4096, max_disk_entries=500000, namespace='ch'):
+        self.path = path
+        self.capacity = capacity
+        self.max_disk_entries = max_disk_entries
+        # 不同语言/模型的识别结果互不复用
+        self.namespace = namespace
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS ocr_results ("
+            "key TEXT PRIMARY KEY, lines TEXT NOT NULL, used REAL NOT NULL)"
+        )
+        self.db.commit()
+
+    def fingerprint(self, region, context=''):
+        """计算区域内容指纹，context 区分产生识别结果的配置（引擎、文本行定位方式）"""
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(f"{self.namespace}:{context}:{region.shape}:{region.dtype}".encode())
+        digest.update(memoryview(region if region.flags.c_contiguous else region.copy()))
+        return digest.hexdigest()
+
+    def get(self, key):
+        """查询缓存，未命中返回 None"""
+        with self.lock:
+            lines = self.memory.get(key)
+            if lines is not None:
+                self.memory.move_to_end(key)
+                self.hits += 1
+                return lines
+
+            row = self.db.execute("SELECT lines FROM ocr_results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            lines = [tuple(line) for line in json.loads(row[0])]
+            self._remember(key, lines)
+            self.hits += 1
+            return lines
+
+    def put_many(self, items):
+        """写入一批 (键, 识别结果)，一次事务提交"""
+        if not items:
+            return
+        now = time.time()
+        with self.lock:
+            for key, lines in items:
+                self._remember(key, lines)
+            self.db.executemany(
+                "INSERT OR REPLACE INTO ocr_results (key, lines, used) VALUES (?, ?, ?)",
+                [(key, json.dumps(lines, ensure_ascii=False), now) for key, lines in items]
+            )
+            self.db.commit()
+
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def close(self):
+        """清理超出上限的旧记录并关闭数据库"""
+        with self.lock:
+            count = self.db.execute("SELECT COUNT(*) FROM ocr_results").fetchone()[0]
+            if count > self.max_disk_entries:
+                self.db.execute(
+                    "DELETE FROM ocr_results WHERE key IN ("
+                    "SELECT key FROM ocr_results ORDER BY used LIMIT ?)",
+                    (count - self.max_disk_entries,)
+                )
+                self.db.commit()
+            self.db.close()
+
+    def _remember(self, key, lines):
+        self.memory[key] = lines
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.capacity:
+            self.memory.popitem(last=False)
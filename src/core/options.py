@@ -0,0 +1,18 @@
+import json
+
+# 命令行中常直接写成 Python 形式的常量
+PYTHON_LITERALS = {'True': True, 'False': False, 'None': None}
+
+def parse_options(values):
+    """解析 --option key=value，值按JSON解析（也接受 True/False/None），失败时作为字符串"""
+    options = {}
+    for value in values:
+        key, _, raw = value.partition('=')
+        if raw in PYTHON_LITERALS:
+            options[key] = PYTHON_LITERALS[raw]
+            continue
+        try:
+            options[key] = json.loads(raw)
+        except ValueError:
+            options[key] = raw
+    return options
@@ -0,0 +1,140 @@
+import queue
+import threading
+import time
+
+# 阶段结束标记
+_END = object()
+
+class _Failure:
+    """上游阶段抛出的异常，随数据流传递给下游"""
+
+    def __init__(self, error):
+        self.error = error
+
+class StageQueue:
+    """阶段之间的有界队列，统计上游被阻塞（下游太慢）和下游空等（上游太慢）的次数与时长"""
+
+    def __init__(self, name, maxsize, stop_event):
+        self.name = name
+        self.queue = queue.Queue(maxsize)
+        self.stop_event = stop_event
+        self.put_stalls = 0
+        self.put_stall_time = 0.0
+        self.get_stalls = 0
+        self.get_stall_time = 0.0
+
+    def put(self, item):
+        """放入数据，队列满时阻塞直到有空位或流水线停止，返回是否放入"""
+        try:
+            self.queue.put_nowait(item)
+            return True
+        except queue.Full:
+            pass
+        self.put_stalls += 1
+        start = time.perf_counter()
+        try:
+            while not self.stop_event.is_set():
+                try:
+                    self.queue.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        finally:
+            self.put_stall_time += time.perf_counter() - start
+
+    def get(self):
+        """取出数据，队列空时阻塞，流水线停止时返回结束标记"""
+        try:
+            return self.queue.get_nowait()
+        except queue.Empty:
+            pass
+        self.get_stalls += 1
+        start = time.perf_counter()
+        try:
+            while not self.stop_event.is_set():
+                try:
+                    return self.queue.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+            return _END
+        finally:
+            self.get_stall_time += time.perf_counter() - start
+
+    def __iter__(self):
+        """逐个取出数据直到结束标记，上游异常在此处重新抛出"""
+        while True:
+            item = self.get()
+            if item is _END:
+                return
+            if isinstance(item, _Failure):
+                raise item.error
+            yield item
+
+    def stats(self):
+        return {
+            'blocked': self.put_stalls,
+            'blocked_seconds': round(self.put_stall_time, 3),
+            'starved': self.get_stalls,
+            'starved_seconds': round(self.get_stall_time, 3)
+        }
+
+class Pipeline:
+    """多线程流水线：每个阶段在独立线程中运行，阶段之间用有界队列连接实现背压"""
+
+    def __init__(self, maxsize=8):
+        self.maxsize = maxsize
+        self.stop_event = threading.Event()
+        self.queues = []
+        self.threads = []
+
+    def source(self, name, iterable):
+        """启动数据源阶段，返回其输出队列"""
+        output = self._queue(name)
+        self._start(name, self._run_source, iterable, output)
+        return output
+
+    def stage(self, name, upstream, func):
+        """启动处理阶段：对上游每个数据调用 func，返回值为 None 时丢弃"""
+        output = self._queue(name)
+        self._start(name, self._run_stage, upstream, func, output)
+        return output
+
+    def close(self):
+        """停止所有阶段并等待线程退出"""
+        self.stop_event.set()
+        for thread in self.threads:
+            thread.join()
+
+    def stats(self):
+        """各阶段输出队列的阻塞统计"""
+        return {q.name: q.stats() for q in self.queues}
+
+    def _queue(self, name):
+        output = StageQueue(name, self.maxsize, self.stop_event)
+        self.queues.append(output)
+        return output
+
+    def _start(self, name, target, *args):
+        thread = threading.Thread(target=target, args=args, name=f"pipeline-{name}", daemon=True)
+        thread.start()
+        self.threads.append(thread)
+
+    def _run_source(self, iterable, output):
+        try:
+            for item in iterable:
+                if not output.put(item):
+                    return
+        except Exception as e:
+            output.put(_Failure(e))
+        output.put(_END)
+
+    def _run_stage(self, upstream, func, output):
+        try:
+            for item in upstream:
+                result = func(item)
+                if result is not None and not output.put(result):
+                    return
+        except Exception as e:
+            output.put(_Failure(e))
+        output.put(_END)
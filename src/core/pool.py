@@ -0,0 +1,230 @@
+import multiprocessing
+import os
+import queue
+import signal
+import time
+from .result_store import ResultStore, default_store_path, result_key
+from .urls import is_stream_url
+
+# 处理中发送统计消息的最小间隔（秒）
+STATS_INTERVAL = 1.0
+# 未指定字幕区域时自动检测，置信度低于该值时处理整个画面
+MIN_AREA_CONFIDENCE = 0.5
+
+def default_worker_count(task_count=None):
+    """默认进程数：每个OCR引擎约占4个核心"""
+    workers = max(1, (os.cpu_count() or 1) // 4)
+    if task_count:
+        workers = min(workers, task_count)
+    return workers
+
+def _worker_main(worker_id, extractor_options, store_path, task_queue, message_queue, stop_event):
+    """工作进程：只加载一次OCR引擎，然后循环从任务队列取视频处理"""
+    # OpenCV 和推理库只在工作进程中导入，导入本模块（如图形界面）不会加载
+    from .area_detector import SubtitleAreaDetector
+    from .extractor import SubtitleExtractor
+
+    # 终端的 Ctrl+C 会发给整个进程组，由主进程通过 stop_event 统一中断
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    try:
+        extractor = SubtitleExtractor(**extractor_options)
+        store = ResultStore(store_path) if store_path else None
+    except Exception as e:
+        message_queue.put(('error', None, f"进程 {worker_id} OCR引擎初始化失败: {str(e)}"))
+        return
+    message_queue.put(('ready', None, worker_id))
+
+    while True:
+        task = task_queue.get()
+        if task is None:
+            break
+        task_id, video_path, output_path, subtitle_area, lang, frame_range, save_stream_to = task
+
+        if stop_event.is_set():
+            message_queue.put(('interrupted', task_id, "处理被用户中断"))
+            continue
+
+        last_stats = [0.0]
+
+        def progress_callback(progress):
+            if stop_event.is_set():
+                raise InterruptedError("处理被用户中断")
+            message_queue.put(('progress', task_id, progress))
+            # 处理统计（含各阶段耗时）最多每秒发送一次
+            now = time.monotonic()
+            if now - last_stats[0] >= STATS_INTERVAL:
+                last_stats[0] = now
+                message_queue.put(('stats', task_id, dict(extractor.stats, metrics=extractor.metrics.report())))
+
+        def cue_callback(cue, info):
+            message_queue.put(('cue', task_id, cue))
+
+        message_queue.put(('started', task_id, worker_id))
+        try:
+            if frame_range:
+                # 分段任务：只返回该范围内的字幕条目，由调用方合并；output_path 为分段检查点的位置
+                cues = extractor.extract_shard(
+                    video_path,
+                    subtitle_area,
+                    frame_range[0],
+                    frame_range[1],
+                    output_path,
+                    callback=progress_callback
+                )
+                message_queue.put(('done', task_id, {'stats': extractor.stats, 'cues': cues}))
+            else:
+                # 相同视频、区域和参数已处理过时直接复用结果（网络视频无法预先计算指纹）；
+                # 按请求的区域查找，未指定区域（自动检测）的结果同样可以复用，命中时不必再检测
+                key = None
+                if store and not is_stream_url(video_path):
+                    key = result_key(video_path, subtitle_area, lang, extractor_options)
+                    if store.get(key, output_path):
+                        message_queue.put(('done', task_id, {'stats': {'result_cached': True}}))
+                        continue
+                # 未指定字幕区域时自动检测（网络视频无法随机取帧，处理整个画面）
+                detected = None
+                if subtitle_area is None and not is_stream_url(video_path):
+                    area, confidence = SubtitleAreaDetector().detect(video_path)
+                    detected = {'subtitle_area': area, 'area_confidence': confidence}
+                    if area and confidence >= MIN_AREA_CONFIDENCE:
+                        subtitle_area = area
+                started = time.time()
+                stats = extractor.extract_subtitles(
+                    video_path,
+                    output_path,
+                    lang,
+                    subtitle_area,
+                    callback=progress_callback,
+                    save_stream_to=save_stream_to,
+                    on_cue=cue_callback
+                )
+                if key and 'error' not in stats and _written_since(output_path, started):
+                    store.put(key, output_path)
+                if detected:
+                    stats.update(detected)
+                message_queue.put(('done', task_id, {'stats': stats}))
+        except InterruptedError as e:
+            message_queue.put(('interrupted', task_id, str(e)))
+        except Exception as e:
+            message_queue.put(('failed', task_id, str(e)))
+
+    extractor.close()
+
+def _written_since(path, timestamp):
+    """文件是否在 timestamp 之后写入（未提取到字幕时不会生成新文件）"""
+    return os.path.exists(path) and os.path.getmtime(path) >= timestamp - 1
+
+class ExtractorPool:
+    """字幕提取进程池：每个进程持有独立的OCR引擎，通过队列接收任务并回传进度和日志
+
+    消息格式为 (类型, 任务ID, 数据)，类型包括 ready / started / progress / stats /
+    cue / done / failed / interrupted / error。cue 为整段视频任务中刚完成的一条字幕，
+    stats 为处理中的统计快照（含流水线各阶段的阻塞时长）。
+    """
+
+    def __init__(self, workers=None, extractor_options=None, result_store=True):
+        self.workers = workers or default_worker_count()
+        # 结果库目录，True 使用默认目录，None/False 不复用已有结果
+        self.result_store = default_store_path() if result_store is True else result_store or None
+        self.extractor_options = dict(extractor_options or {})
+        if 'cpu_threads' not in self.extractor_options:
+            self.extractor_options['cpu_threads'] = max(1, (os.cpu_count() or 1) // self.workers)
+
+        # 使用 spawn 启动，避免子进程继承Qt和已初始化的推理库状态
+        self.context = multiprocessing.get_context('spawn')
+        self.task_queue = self.context.Queue()
+        self.message_queue = self.context.Queue()
+        self.stop_event = self.context.Event()
+        self.processes = []
+        # 由读取到的消息维护：已加载完OCR引擎的进程、初始化失败的进程、进程ID -> 正在处理的任务ID
+        self.ready = set()
+        self.failed = set()
+        self.running = {}
+
+    def start(self):
+        """启动工作进程"""
+        for worker_id in range(self.workers):
+            self.processes.append(self._spawn(worker_id))
+
+    def _spawn(self, worker_id):
+        process = self.context.Process(
+            target=_worker_main,
+            args=(worker_id, self.extractor_options, self.result_store, self.task_queue,
+                  self.message_queue, self.stop_event),
+            daemon=True
+        )
+        process.start()
+        return process
+
+    def submit(self, task_id, video_path, output_path, subtitle_area, lang='ch', save_stream_to=None):
+        """提交一个视频处理任务，video_path 可以是 http(s) 地址（边下载边处理）"""
+        self.task_queue.put((task_id, video_path, output_path, subtitle_area, lang, None, save_stream_to))
+
+    def submit_range(self, task_id, video_path, subtitle_area, start_frame, end_frame, lang='ch', shard_path=None):
+        """提交一个分段任务，完成消息中携带该段的字幕条目；指定 shard_path 时保存分段检查点"""
+        self.task_queue.put((task_id, video_path, shard_path, subtitle_area, lang, (start_frame, end_frame), None))
+
+    def get_message(self, timeout=None):
+        """读取一条进度/日志消息，超时返回 None"""
+        try:
+            message = self.message_queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        kind, task_id, payload = message
+        if kind == 'ready':
+            self.ready.add(payload)
+        elif kind == 'started':
+            self.running[payload] = task_id
+        elif kind in ('done', 'failed', 'interrupted'):
+            for worker_id, running_task in list(self.running.items()):
+                if running_task == task_id:
+                    del self.running[worker_id]
+        return message
+
+    def check_workers(self):
+        """检查工作进程，返回意外退出的进程正在处理的任务ID列表
+
+        处理中崩溃（如推理库段错误）的进程会重新启动；加载OCR引擎时就退出的进程记为失败，
+        不再重启（重启也会同样失败）。需要在读取完已到达的消息后调用。
+        """
+        lost = []
+        for worker_id, process in enumerate(self.processes):
+            if process.is_alive() or worker_id in self.failed:
+                continue
+            if worker_id not in self.ready:
+                self.failed.add(worker_id)
+                continue
+            self.ready.discard(worker_id)
+            task_id = self.running.pop(worker_id, None)
+            if task_id is not None:
+                lost.append(task_id)
+            print(f"处理进程 {worker_id} 意外退出（退出码 {process.exitcode}），重新启动")
+            self.processes[worker_id] = self._spawn(worker_id)
+        return lost
+
+    def has_workers(self):
+        """是否还有可用的工作进程（不是所有进程都初始化失败）"""
+        return len(self.failed) < self.workers
+
+    def is_alive(self):
+        """是否还有存活的工作进程"""
+        return any(process.is_alive() for process in self.processes)
+
+    def stop(self):
+        """通知所有进程中断当前任务并放弃排队的任务"""
+        self.stop_event.set()
+
+    def reset(self):
+        """清除中断标记，进程池可以继续接收新任务"""
+        self.stop_event.clear()
+
+    def close(self, timeout=5):
+        """结束工作进程，超时仍未退出的进程强制终止"""
+        for _ in self.processes:
+            self.task_queue.put(None)
+        deadline = time.monotonic() + timeout
+        for process in self.processes:
+            process.join(max(0, deadline - time.monotonic()))
+            if process.is_alive():
+                process.terminate()
+        self.processes.clear()
@@ -0,0 +1,117 @@
+import time
+import cv2
+import numpy as np
+
+class AdaptiveThreshold:
+    """自适应阈值二值化（原固定流程的做法）"""
+    name = 'threshold'
+
+    def __init__(self, block_size=11, c=2):
+        self.block_size = block_size
+        self.c = c
+
+    def __call__(self, image, region):
+        return cv2.adaptiveThreshold(
+            image, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, self.block_size, self.c
+        )
+
+class SubtitleColorMask:
+    """白字黑边字幕的颜色掩码：只保留周围有明显更暗描边的高亮、低饱和度像素，输出白底黑字
+
+    描边按局部对比度判断（像素比半径内最暗的像素亮出 outline_contrast），浅色背景上
+    被压缩模糊的细描边也能识别。亮度阈值和饱和度上限在视频开头几帧有描边的画面上
+    校准一次（描边附近的像素用 Otsu 分为文字和背景两类），之后固定不变。
+    输入只有灰度（ffmpeg 解码、自适应采样）时只用亮度。
+    """
+    name = 'color_mask'
+
+    def __init__(self, calibration_frames=5, outline_contrast=80, outline_radius=2,
+                 luma_threshold=200, max_saturation=60):
+        self.calibration_frames = calibration_frames
+        self.outline_contrast = outline_contrast
+        # 描边搜索半径的下限，实际半径随字幕带高度增大（笔画更粗）
+        self.outline_radius = outline_radius
+        self.kernels = {}
+        # 校准前使用的默认值
+        self.luma_threshold = luma_threshold
+        self.max_saturation = max_saturation
+        self.calibrated = False
+        self.luma_samples = []
+        self.saturation_samples = []
+
+    def __call__(self, image, region):
+        radius = max(self.outline_radius, image.shape[0] // 20)
+        kernel = self.kernels.get(radius)
+        if kernel is None:
+            kernel = self.kernels[radius] = np.ones((2 * radius + 1, 2 * radius + 1), np.uint8)
+        contrast = cv2.subtract(image, cv2.erode(image, kernel))
+        outlined = cv2.threshold(contrast, self.outline_contrast - 1, 255, cv2.THRESH_BINARY)[1]
+        hsv = cv2.cvtColor(region, cv2.COLOR_BGR2HSV) if region.ndim == 3 else None
+        if not self.calibrated:
+            self._collect(image, hsv, outlined)
+
+        if hsv is not None:
+            text = cv2.inRange(hsv, (0, 0, self.luma_threshold), (180, self.max_saturation, 255))
+        else:
+            text = cv2.threshold(image, self.luma_threshold - 1, 255, cv2.THRESH_BINARY)[1]
+        return cv2.bitwise_not(cv2.bitwise_and(text, outlined))
+
+    def _collect(self, image, hsv, outlined):
+        """收集描边附近的像素（文字和描边外侧的背景），攒够帧数后计算阈值"""
+        selected = outlined > 0
+        # 描边太少的画面（没有字幕）不参与校准
+        if np.count_nonzero(selected) < 50:
+            return
+        self.luma_samples.append(image[selected])
+        if hsv is not None:
+            self.saturation_samples.append(hsv[..., 1][selected])
+        if len(self.luma_samples) < self.calibration_frames:
+            return
+
+        # 描边内侧的文字比外侧的背景亮，Otsu 把两者分开
+        luma = np.concatenate(self.luma_samples)
+        otsu = cv2.threshold(luma.reshape(-1, 1), 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)[0]
+        self.luma_threshold = int(max(otsu, 180))
+        if self.saturation_samples:
+            saturation = np.concatenate(self.saturation_samples)[luma >= self.luma_threshold]
+            if len(saturation):
+                self.max_saturation = int(np.clip(np.percentile(saturation, 95) + 20, 30, 120))
+        self.calibrated = True
+        self.luma_samples = []
+        self.saturation_samples = []
+        print(f"字幕颜色校准完成: 亮度阈值 {self.luma_threshold}, 饱和度上限 {self.max_saturation}")
+
+# 预处理方案：名称 -> 创建步骤列表的函数（有状态的步骤每个视频重新创建）
+# fast 不做二值化，直接把灰度图交给OCR；detection='projection' 需要二值化的方案
+PROFILES = {
+    'default': lambda: [AdaptiveThreshold()],
+    'fast': lambda: [],
+    'color_mask': lambda: [SubtitleColorMask()]
+}
+
+# 不做二值化的方案，投影切行无法在灰度图上定位文本行
+GRAYSCALE_PROFILES = {'fast'}
+
+class Preprocessor:
+    """按顺序执行预处理步骤，每一步的耗时记录到 preprocess.<步骤名> 直方图"""
+
+    def __init__(self, profile='default', metrics=None):
+        if profile not in PROFILES:
+            raise ValueError(f"未知的预处理方案: {profile}，可选: {', '.join(PROFILES)}")
+        self.steps = PROFILES[profile]()
+        self.metrics = metrics
+
+    def __call__(self, gray, region=None):
+        """gray 为灰度字幕区域，region 为原始（可能是彩色的）字幕区域"""
+        if region is None:
+            region = gray
+        image = gray
+        for step in self.steps:
+            start = time.perf_counter()
+            image = step(image, region)
+            if self.metrics:
+                self.metrics.observe(f"preprocess.{step.name}", time.perf_counter() - start)
+        # 输入可能是复用的缓冲区，结果要留在识别批次中，不能与输入共用内存
+        if np.may_share_memory(image, gray) or np.may_share_memory(image, region):
+            image = image.copy()
+        return image
@@ -0,0 +1,250 @@
+import time
+import cv2
+import numpy as np
+from ..utils.logger import debug
+
+class BatchRecognizer:
+    """批量识别：将多帧字幕区域纵向拼接后一次送入OCR，再按位置拆分结果"""
+
+    def __init__(self, ocr, min_confidence=0.5, gap=16, cache=None, metrics=None, detection='model'):
+        self.ocr = ocr
+        self.min_confidence = min_confidence
+        # 相邻区域之间的空白行数，避免检测框跨越两帧
+        self.gap = gap
+        # 可选的 OcrCache，命中的区域不再送入OCR
+        self.cache = cache
+        # 可选的 Metrics，记录每次OCR调用的耗时
+        self.metrics = metrics
+        # 文本行定位方式: 'model' 使用OCR的检测模型；'projection' 用投影直方图切出文本行，
+        # 跳过检测和方向分类，只调用识别模型
+        self.detection = detection
+        # 缓存键包含引擎类型和文本行定位方式，共用的缓存不会返回其他配置的识别结果
+        self.cache_context = f"{type(ocr).__module__}.{type(ocr).__name__}:{detection}"
+        self.stats = {
+            'ocr_calls': 0,
+            'ocr_regions': 0,
+            'ocr_failed': 0,
+            'cache_hits': 0
+        }
+
+    def capacity(self, region_shape, batch_size):
+        """单批最多拼接的区域数：拼接后高度不超过宽度，检测模型的缩放比例与单帧一致"""
+        if self.detection == 'projection':
+            # 文本行裁剪后一起识别，不需要拼接
+            return batch_size
+        height, width = region_shape[:2]
+        fit = (width + self.gap) // (height + self.gap)
+        return max(1, min(batch_size, fit))
+
+    def recognize(self, regions, with_confidence=False):
+        """识别一组预处理后的区域，返回与输入顺序一致的文本列表
+
+        with_confidence 为 True 时返回 (文本, 平均置信度) 列表，没有文本时置信度为 None。
+        OCR调用失败的区域文本为 None（不是“没有文字”），结果也不写入缓存。
+        """
+        if not regions:
+            return []
+
+        results = [None] * len(regions)
+        keys = [None] * len(regions)
+        if self.cache:
+            for i, region in enumerate(regions):
+                keys[i] = self.cache.fingerprint(region, self.cache_context)
+                results[i] = self.cache.get(keys[i])
+            self.stats['cache_hits'] += sum(1 for lines in results if lines is not None)
+
+        misses = [i for i, lines in enumerate(results) if lines is None]
+        if misses:
+            recognized = self._recognize_lines([regions[i] for i in misses])
+            for i, lines in zip(misses, recognized):
+                results[i] = lines
+            failed = [i for i in misses if results[i] is None]
+            self.stats['ocr_failed'] += len(failed)
+            if self.cache:
+                self.cache.put_many([(keys[i], results[i]) for i in misses if results[i] is not None])
+
+        texts = []
+        for lines in results:
+            if lines is None:
+                texts.append((None, None) if with_confidence else None)
+                continue
+            parts = []
+            confidences = []
+            for text_content, confidence in lines:
+                if confidence > self.min_confidence:
+                    parts.append(text_content)
+                    confidences.append(confidence)
+                    debug(f"识别文本: {text_content} (置信度: {confidence})")
+            text = " ".join(parts)
+            if with_confidence:
+                texts.append((text, sum(confidences) / len(confidences) if confidences else None))
+            else:
+                texts.append(text)
+        return texts
+
+    def _recognize_lines(self, regions):
+        """OCR识别（多个区域拼接为一次调用），返回每个区域的 [(文本, 置信度)]，调用失败时为 None"""
+        if self.detection == 'projection':
+            return self._recognize_projected(regions)
+        self.stats['ocr_calls'] += 1
+        self.stats['ocr_regions'] += len(regions)
+        if len(regions) == 1:
+            return self._split(self._run(regions[0]), 1, [0])
+
+        stacked, offsets = self._stack(regions)
+        return self._split(self._run(stacked), len(regions), offsets)
+
+    def _recognize_projected(self, regions):
+        """投影切出各区域的文本行，所有行裁剪后一次送入识别模型"""
+        self.stats['ocr_regions'] += len(regions)
+        results = [[] for _ in regions]
+        owners = []
+        crops = []
+        for i, region in enumerate(regions):
+            for y1, y2, x1, x2 in find_text_lines(region):
+                crop = region[y1:y2, x1:x2]
+                # 识别模型需要三通道输入
+                crops.append(cv2.cvtColor(crop, cv2.COLOR_GRAY2BGR) if crop.ndim == 2 else crop)
+                owners.append(i)
+        if not crops:
+            return results
+
+        self.stats['ocr_calls'] += 1
+        recognized = self._run_recognition(crops)
+        if recognized is None:
+            # 有文本行的区域识别失败，没有文本行的区域结果仍然可靠
+            for i in set(owners):
+                results[i] = None
+            return results
+        for i, (text_content, confidence) in zip(owners, recognized):
+            if text_content:
+                results[i].append((text_content, float(confidence)))
+        return results
+
+    def _stack(self, regions):
+        """纵向拼接区域，空白处填充背景色(白色)"""
+        width = max(region.shape[1] for region in regions)
+        height = sum(region.shape[0] for region in regions) + self.gap * (len(regions) - 1)
+        stacked = np.full((height, width) + regions[0].shape[2:], 255, dtype=regions[0].dtype)
+
+        offsets = []
+        y = 0
+        for region in regions:
+            offsets.append(y)
+            stacked[y:y + region.shape[0], :region.shape[1]] = region
+            y += region.shape[0] + self.gap
+        return stacked, offsets
+
+    def _split(self, lines, count, offsets):
+        """根据文本框中心的纵坐标把识别结果分配回各个区域"""
+        if lines is None:
+            return [None] * count
+        results = [[] for _ in range(count)]
+        for box, text_content, confidence in lines:
+            center_y = sum(point[1] for point in box) / len(box)
+            index = int(np.searchsorted(offsets, center_y, side='right')) - 1
+            results[max(index, 0)].append((text_content, float(confidence)))
+        return results
+
+    def _run(self, image):
+        """调用OCR并展开为 (文本框, 文本, 置信度) 列表，失败时返回 None"""
+        result = None
+        start = time.perf_counter()
+        try:
+            result = self.ocr.ocr(image, cls=True)
+            if self.metrics:
+                self.metrics.observe('ocr', time.perf_counter() - start)
+            return list(iter_ocr_lines(result))
+        except Exception as e:
+            print(f"OCR处理失败: {str(e)}, result={result}")
+            return None
+
+    def _run_recognition(self, crops):
+        """只调用识别模型，返回每个裁剪行的 (文本, 置信度)，失败时返回 None"""
+        result = None
+        start = time.perf_counter()
+        try:
+            # 嵌套一层列表：PaddleOCR 把内层列表当作一组已裁剪的行，整批送入识别模型
+            result = self.ocr.ocr([crops], det=False, cls=False)
+            if self.metrics:
+                self.metrics.observe('ocr', time.perf_counter() - start)
+            return list(iter_rec_results(result, len(crops)))
+        except Exception as e:
+            print(f"OCR处理失败: {str(e)}, result={result}")
+            return None
+
+def find_text_lines(binary, min_ink_ratio=0.01, line_gap=None, padding=4):
+    """在二值化的字幕区域中用水平/垂直投影定位文本行，返回 [(y1, y2, x1, x2)]
+
+    文字笔画为黑色(0)、背景为白色(255)。行内笔画稀疏时允许 line_gap 行的空白；
+    水平范围取墨迹列的 1% 和 99% 分位，零星噪点不会把文本框拉宽。
+    """
+    height, width = binary.shape[:2]
+    ink = binary < 128
+    if ink.ndim == 3:
+        ink = ink.any(axis=2)
+    if line_gap is None:
+        line_gap = max(2, height // 10)
+    rows = np.flatnonzero(ink.sum(axis=1) >= max(2, int(width * min_ink_ratio)))
+    if not len(rows):
+        return []
+
+    bands = []
+    start = previous = int(rows[0])
+    for y in rows[1:]:
+        y = int(y)
+        if y - previous > line_gap:
+            bands.append((start, previous + 1))
+            start = y
+        previous = y
+    bands.append((start, previous + 1))
+
+    lines = []
+    min_height = max(4, height // 8)
+    for y1, y2 in bands:
+        if y2 - y1 < min_height:
+            continue
+        columns = np.flatnonzero(ink[y1:y2].any(axis=0))
+        x1 = int(np.percentile(columns, 1))
+        x2 = int(np.percentile(columns, 99)) + 1
+        lines.append((
+            max(0, y1 - padding), min(height, y2 + padding),
+            max(0, x1 - padding), min(width, x2 + padding)
+        ))
+    return lines
+
+def iter_rec_results(result, count):
+    """兼容两种返回格式：[[(文本, 置信度), ...]] 整批结果，或每行一个 [(文本, 置信度)]"""
+    if not result:
+        return
+    if len(result) == 1 and isinstance(result[0], list) and len(result[0]) == count:
+        items = result[0]
+    else:
+        items = [item[0] if isinstance(item, list) and item else item for item in result]
+    for item in items:
+        if isinstance(item, (tuple, list)) and len(item) >= 2:
+            yield item[0], item[1]
+        else:
+            yield "", 0.0
+
+def iter_ocr_lines(result):
+    """兼容新旧版本PaddleOCR的返回格式，逐个产出 (文本框, 文本, 置信度)"""
+    if not result:
+        return
+    for line in result:
+        try:
+            if not isinstance(line, list):
+                continue
+            # 处理单个文本框的情况: [box, (text, confidence)]
+            if len(line) >= 2 and isinstance(line[1], tuple):
+                text_content, confidence = line[1]
+                yield line[0], text_content, confidence
+                continue
+            # 处理多个文本框的情况: [[box, (text, confidence)], ...]
+            for box_text in line:
+                if isinstance(box_text, list) and len(box_text) >= 2 and isinstance(box_text[1], tuple):
+                    text_content, confidence = box_text[1]
+                    yield box_text[0], text_content, confidence
+        except Exception as e:
+            print(f"处理OCR结果出错: {str(e)}, line={line}")
+            continue
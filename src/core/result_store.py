@@ -0,0 +1,115 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import uuid
+
+# 只影响速度、不影响识别结果的提取参数，不参与结果键
+_PERFORMANCE_OPTIONS = ('cpu_threads', 'pipeline_depth', 'ocr_batch_size', 'ocr_cache', 'cache_path',
+                        'checkpoint_interval', 'debug', 'metrics_report', 'reuse_buffers')
+
+def default_store_path():
+    """默认的结果库目录: <项目根目录>/cache/results"""
+    project_root = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+    return os.path.join(project_root, 'cache', 'results')
+
+def video_fingerprint(video_path, chunk_size=65536, chunks=16):
+    """视频内容指纹：文件大小加均匀分布的若干数据块，不读取整个文件"""
+    size = os.path.getsize(video_path)
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(str(size).encode())
+    with open(video_path, 'rb') as f:
+        if size <= chunk_size * chunks:
+            digest.update(f.read())
+        else:
+            step = (size - chunk_size) // (chunks - 1)
+            for i in range(chunks):
+                f.seek(i * step)
+                digest.update(f.read(chunk_size))
+    return digest.hexdigest()
+
+def result_key(video_path, subtitle_area, lang, extractor_options=None):
+    """由视频内容、字幕区域和影响结果的提取参数计算结果键"""
+    options = {
+        name: value for name, value in (extractor_options or {}).items()
+        if name not in _PERFORMANCE_OPTIONS
+    }
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(video_fingerprint(video_path).encode())
+    digest.update(json.dumps(
+        [list(subtitle_area) if subtitle_area else None, lang, options],
+        sort_keys=True,
+        # 自定义OCR引擎等对象按类型名区分
+        default=lambda value: type(value).__name__
+    ).encode())
+    return digest.hexdigest()
+
+class ResultStore:
+    """按内容寻址的字幕结果库：相同视频、区域和参数再次处理时直接复用已生成的字幕文件
+
+    结果以 <键>.<输出格式扩展名> 文件保存在同一目录，GUI和服务端的处理进程共用；
+    总大小超过 max_bytes 时按最近使用时间淘汰。
+    """
+
+    def __init__(self, directory=None, max_bytes=256 * 1024 * 1024):
+        self.directory = directory or default_store_path()
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    def get(self, key, output_path):
+        """命中时把结果复制到 output_path 并返回 True"""
+        path = self._path(key, output_path)
+        try:
+            _copy(path, output_path)
+            # 更新访问时间，淘汰时保留最近使用的结果
+            os.utime(path)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def put(self, key, subtitle_path):
+        """保存一份结果，写入临时文件后原子替换，多个进程同时写入也不会读到半个文件"""
+        if not os.path.exists(subtitle_path):
+            return
+        _copy(subtitle_path, self._path(key, subtitle_path))
+        self._evict()
+
+    def _path(self, key, output_path):
+        """同一结果的不同输出格式分别保存"""
+        return os.path.join(self.directory, key + os.path.splitext(output_path)[1].lower())
+
+    def _evict(self):
+        """总大小超过上限时删除最久未使用的结果"""
+        with self.lock:
+            entries = []
+            for entry in os.scandir(self.directory):
+                if not entry.name.endswith('.tmp'):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+
+def _copy(source, target):
+    """复制到同目录的临时文件后原子替换目标文件"""
+    directory = os.path.dirname(target)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_path = f"{target}.{uuid.uuid4().hex}.tmp"
+    try:
+        shutil.copyfile(source, temp_path)
+        os.replace(temp_path, target)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
@@ -0,0 +1,45 @@
+import numpy as np
+
+def normalize_area(subtitle_area):
+    """字幕区域统一为 (x1, y1, x2, y2) 比例
+
+    兼容旧的 (上边界, 下边界) 两元组（横向为整个画面宽度），None 表示整个画面。
+    """
+    if not subtitle_area:
+        return None
+    if len(subtitle_area) == 2:
+        return (0.0, subtitle_area[0], 1.0, subtitle_area[1])
+    if len(subtitle_area) == 4:
+        return tuple(subtitle_area)
+    raise ValueError(f"字幕区域应为 (上, 下) 或 (x1, y1, x2, y2) 比例: {subtitle_area}")
+
+def area_bounds(subtitle_area, width, height):
+    """字幕区域换算为像素坐标 (x1, y1, x2, y2)，各处裁剪都用这里的取整方式"""
+    area = normalize_area(subtitle_area)
+    if area is None:
+        return 0, 0, width, height
+    return int(width * area[0]), int(height * area[1]), int(width * area[2]), int(height * area[3])
+
+def ink_columns(gray, threshold=60, row_step=4, padding=None):
+    """字幕带中有笔画的横向范围 (x1, x2)，没有笔画时返回 None
+
+    隔 row_step 行取样计算水平梯度，代价远小于二值化。相距超过两个字宽的笔画列分为不同的组，
+    笔画明显少于最大一组的零散组视为背景纹理；两侧各留出约一个字宽（默认为区域高度）的余量，
+    避免切掉边缘的笔画。
+    """
+    height, width = gray.shape[:2]
+    rows = gray[::row_step].astype(np.int16)
+    strokes = (np.abs(np.diff(rows, axis=1)) >= threshold).sum(axis=0)
+    columns = np.flatnonzero(strokes)
+    if not len(columns):
+        return None
+
+    breaks = np.flatnonzero(np.diff(columns) > 2 * height) + 1
+    groups = np.split(columns, breaks)
+    weights = [int(strokes[group].sum()) for group in groups]
+    kept = [group for group, weight in zip(groups, weights) if weight >= 0.25 * max(weights)]
+    if padding is None:
+        padding = height
+    x1 = int(min(group[0] for group in kept))
+    x2 = int(max(group[-1] for group in kept)) + 2
+    return max(0, x1 - padding), min(width, x2 + padding)
@@ -0,0 +1,134 @@
+import cv2
+import os
+from .checkpoint import checkpoint_path
+from .pool import ExtractorPool, default_worker_count
+from .result_store import ResultStore, default_store_path, result_key
+from .subtitles import merge_cues
+from .writers import load_cues, save_cues
+
+# 每段至少包含的时长（秒），过短的分段定位开销大于并行收益
+MIN_SHARD_SECONDS = 60
+
+def plan_shards(total_frames, fps, shards):
+    """把 [0, total_frames) 平均切分为不超过 shards 个帧范围"""
+    min_frames = int(MIN_SHARD_SECONDS * fps)
+    shards = max(1, min(shards, total_frames // max(min_frames, 1)))
+    size = total_frames / shards
+    bounds = [int(round(i * size)) for i in range(shards + 1)]
+    return [(bounds[i], bounds[i + 1]) for i in range(shards)]
+
+def shard_path(output_path, shard_id):
+    """分段检查点以 <输出文件>.shard<序号> 为基准保存在输出文件旁边"""
+    return f"{output_path}.shard{shard_id}"
+
+def extract_sharded(video_path, output_path, subtitle_area, shards=None,
+                    extractor_options=None, callback=None, pool=None):
+    """长视频分段并行提取：各进程定位到自己的时间范围识别，最后合并字幕
+
+    传入已启动的 pool 时复用其中的进程（不会关闭它），否则临时创建进程池。
+    每段定期保存检查点，中断或崩溃后再次处理同一视频时各段从检查点继续。
+    """
+    extractor_options = dict(extractor_options or (pool.extractor_options if pool else {}))
+    store_path = pool.result_store if pool else default_store_path()
+    store = ResultStore(store_path) if store_path else None
+    key = None
+    if store:
+        key = result_key(video_path, subtitle_area, 'ch', extractor_options)
+        if store.get(key, output_path):
+            print(f"使用已有的处理结果: {output_path}")
+            if callback:
+                callback(1.0)
+            return load_cues(output_path)
+
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise IOError(f"无法打开视频文件: {video_path}")
+    fps = cap.get(cv2.CAP_PROP_FPS) or 25.0
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    cap.release()
+
+    if shards is None:
+        shards = pool.workers if pool else default_worker_count()
+    ranges = plan_shards(total_frames, fps, shards)
+    print(f"视频分为 {len(ranges)} 段并行处理: {ranges}")
+
+    sample_interval = extractor_options.get('sample_interval', 0.1)
+    own_pool = pool is None
+    if own_pool:
+        pool = ExtractorPool(len(ranges), extractor_options)
+        pool.start()
+
+    parts = [None] * len(ranges)
+    complete = True
+    progresses = [0.0] * len(ranges)
+    remaining = 0
+    try:
+        for shard_id, (start_frame, end_frame) in enumerate(ranges):
+            pool.submit_range(shard_id, video_path, subtitle_area, start_frame, end_frame,
+                              shard_path=shard_path(output_path, shard_id))
+            remaining += 1
+
+        while remaining:
+            message = pool.get_message(timeout=0.2)
+            if message is None:
+                if pool.check_workers():
+                    raise RuntimeError("处理进程意外退出，再次处理时从检查点继续")
+                if not pool.is_alive():
+                    raise RuntimeError("处理进程已全部退出")
+                continue
+
+            kind, shard_id, payload = message
+            if kind == 'error':
+                raise RuntimeError(payload)
+            if kind == 'progress':
+                progresses[shard_id] = payload
+                if callback:
+                    callback(sum(progresses) / len(progresses))
+            elif kind == 'done':
+                parts[shard_id] = payload['cues']
+                complete = complete and 'error' not in payload['stats']
+                progresses[shard_id] = 1.0
+                remaining -= 1
+            elif kind == 'interrupted':
+                remaining -= 1
+                raise InterruptedError(payload)
+            elif kind == 'failed':
+                remaining -= 1
+                raise RuntimeError(f"第 {shard_id + 1} 段处理失败: {payload}")
+    except Exception:
+        # 中断或任一段失败时通知其余进程尽快退出
+        pool.stop()
+        if not own_pool:
+            _drain(pool, remaining)
+        raise
+    finally:
+        if own_pool:
+            pool.close()
+        else:
+            pool.reset()
+
+    # 相邻两段的采样点最多相差一个采样间隔，边界处相同文本合并为一条
+    cues = merge_cues(parts, max_gap=2 * sample_interval + 0.1)
+    save_cues(cues, output_path)
+    if complete:
+        # 完整结果已保存，删除各段的检查点和之前整段处理中断留下的检查点
+        paths = [checkpoint_path(shard_path(output_path, shard_id)) for shard_id in range(len(ranges))]
+        for path in paths + [checkpoint_path(output_path)]:
+            if os.path.exists(path):
+                os.remove(path)
+        if key and cues:
+            store.put(key, output_path)
+    if callback:
+        callback(1.0)
+    return cues
+
+def _drain(pool, remaining):
+    """等待已提交的分段全部结束，避免残留消息影响进程池的下一批任务"""
+    while remaining:
+        message = pool.get_message(timeout=0.2)
+        if message is None:
+            if not pool.is_alive():
+                return
+            continue
+        if message[0] in ('done', 'failed', 'interrupted'):
+            remaining -= 1
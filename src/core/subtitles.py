@@ -0,0 +1,113 @@
+from ..utils.logger import debug
+
+class SubtitleAssembler:
+    """根据按时间顺序到达的识别文本组装字幕条目 (开始时间, 结束时间, 文本)"""
+
+    def __init__(self, on_cue=None, keep_cues=True):
+        # keep_cues 为 False 时不在内存中保留字幕，只通过 on_cue 交给写入器
+        self.keep_cues = keep_cues
+        self.cues = []
+        # 已完成的字幕条数
+        self.emitted = 0
+        # 每完成一条字幕时回调 on_cue((开始时间, 结束时间, 文本), 附加信息)，
+        # 附加信息包括 confidence（置信度）、start_frame 和 end_frame（帧号，结束帧不含）
+        self.on_cue = on_cue
+        self.current_text = ""
+        self.start_time = 0
+        # 最后一次看到当前文本的时间，字幕至少持续到这里
+        self.last_time = 0
+        self.start_frame = None
+        self.confidence = None
+
+    def feed(self, current_time, text, end_time=None, confidence=None, frame_index=None):
+        """输入一个采样点的识别文本，end_time 为上一条字幕的准确结束时间（已知时）"""
+        if not text:
+            return
+        if text == self.current_text:
+            self.last_time = current_time
+            if confidence is not None:
+                self.confidence = max(self.confidence or 0.0, confidence)
+            return
+        if self.current_text:
+            # 添加当前字幕
+            if end_time is None:
+                end_time = self._default_end(current_time)
+            self._emit((self.start_time, end_time, self.current_text), frame_index)
+            debug(f"添加字幕: {self.current_text}")
+
+        # 开始新字幕
+        self.current_text = text
+        self.start_time = current_time
+        self.last_time = current_time
+        self.start_frame = frame_index
+        self.confidence = confidence
+
+    def clear(self, current_time, end_time=None, frame_index=None):
+        """采样点画面上没有字幕：结束当前字幕，之后出现相同文本时作为新字幕"""
+        if not self.current_text:
+            return
+        if end_time is None:
+            end_time = self._default_end(current_time)
+        self._emit((self.start_time, end_time, self.current_text), frame_index)
+        debug(f"添加字幕: {self.current_text}")
+        self.current_text = ""
+
+    def _default_end(self, current_time):
+        """结束时间未知时取本采样点前 0.1 秒，但不早于最后一次看到该文本的时间"""
+        # 采样间隔小于 0.1 秒（如 25fps 时为 0.08 秒）时，只出现在一个采样点的文本不会早于开始时间结束
+        return max(self.last_time, current_time - 0.1)
+
+    def finish(self, end_time, end_frame=None):
+        """结束最后一条字幕，返回全部字幕条目"""
+        if self.current_text:
+            self._emit((self.start_time, end_time, self.current_text), end_frame)
+            self.current_text = ""
+        return self.cues
+
+    def state(self):
+        """可序列化的当前状态，用于检查点"""
+        return {
+            'cues': [list(cue) for cue in self.cues],
+            'current_text': self.current_text,
+            'start_time': self.start_time,
+            'last_time': self.last_time,
+            'start_frame': self.start_frame,
+            'confidence': self.confidence
+        }
+
+    def restore(self, state):
+        """从检查点恢复已完成的字幕和未结束的字幕"""
+        self.cues = [tuple(cue) for cue in state['cues']]
+        self.current_text = state['current_text']
+        self.start_time = state['start_time']
+        self.last_time = state.get('last_time', self.start_time)
+        self.start_frame = state.get('start_frame')
+        self.confidence = state.get('confidence')
+
+    def _emit(self, cue, end_frame):
+        self.emitted += 1
+        if self.keep_cues:
+            self.cues.append(cue)
+        if self.on_cue:
+            self.on_cue(cue, {
+                'confidence': self.confidence,
+                'start_frame': self.start_frame,
+                'end_frame': end_frame
+            })
+
+def merge_cues(parts, max_gap):
+    """按时间顺序合并各分段的字幕条目
+
+    字幕跨越分段边界时，前一段的最后一条和后一段的第一条文本相同且首尾相接，
+    合并为一条，避免重复或被截断。
+    """
+    merged = []
+    for cues in parts:
+        for index, (start, end, text) in enumerate(cues):
+            if index == 0 and merged:
+                last_start, last_end, last_text = merged[-1]
+                if last_text == text and start - last_end <= max_gap:
+                    merged[-1] = (last_start, max(last_end, end), text)
+                    continue
+            merged.append((start, end, text))
+    return merged
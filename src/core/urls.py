@@ -0,0 +1,3 @@
+def is_stream_url(video_path):
+    """是否为需要边下载边解码的网络地址"""
+    return video_path.startswith(('http://', 'https://'))
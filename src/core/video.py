@@ -150,12 +150,11 @@ class VideoProcessor:
                     current_frame = int(self.cap.get(cv2.CAP_PROP_POS_FRAMES))
                     self.cap.set(cv2.CAP_PROP_POS_FRAMES, max(0, current_frame - int(fps * 5)))
                 elif key == 13 and self.selection and paused:  # Enter
+                    # 返回完整矩形 (x1, y1, x2, y2)，坐标为相对宽高的比例
                     x1, y1, x2, y2 = self.selection
-                    height = frame.shape[0]
-                    bottom_ratio = y1 / height
-                    top_ratio = y2 / height
+                    height, width = frame.shape[:2]
                     self.close()
-                    return (bottom_ratio, top_ratio)
+                    return (x1 / width, y1 / height, x2 / width, y2 / height)
                 elif key == ord('q'):  # Q
                     break
                     
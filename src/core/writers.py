@@ -0,0 +1,172 @@
+import json
+import os
+import threading
+import time
+
+def format_timestamp(seconds, separator=','):
+    """秒数格式化为 HH:MM:SS,mmm（整数运算，不经过 strftime）"""
+    millis = int(round(max(seconds, 0) * 1000))
+    hours, millis = divmod(millis, 3600000)
+    minutes, millis = divmod(millis, 60000)
+    secs, millis = divmod(millis, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}{separator}{millis:03d}"
+
+def parse_timestamp(value):
+    """解析 HH:MM:SS,mmm 或 HH:MM:SS.mmm"""
+    clock, millis = value.strip().replace('.', ',').split(',')
+    hours, minutes, seconds = (int(part) for part in clock.split(':'))
+    return round(hours * 3600 + minutes * 60 + seconds + int(millis) / 1000, 3)
+
+class SubtitleWriter:
+    """逐条追加写入字幕文件，按时间间隔刷新到磁盘，处理过程中外部程序即可读取已完成的字幕
+
+    resume 为检查点中保存的 {'offset', 'count'} 时，截断到该位置后继续写入。
+    """
+
+    def __init__(self, path, flush_interval=1.0, resume=None):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.count = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        if resume:
+            self.file = open(path, 'r+b')
+            self.file.truncate(resume['offset'])
+            self.file.seek(resume['offset'])
+            self.count = resume['count']
+        else:
+            self.file = open(path, 'wb')
+            self.file.write(self.header().encode('utf-8'))
+        self.last_flush = time.monotonic()
+        # 未到刷新间隔时写入的字幕由定时器按时刷新，字幕间隔很长或网络视频卡住时也不会一直留在缓冲区
+        self.lock = threading.Lock()
+        self.timer = None
+
+    def header(self):
+        return ""
+
+    def format(self, index, cue, info):
+        raise NotImplementedError
+
+    def write(self, cue, info=None):
+        """追加一条字幕，距上次刷新超过间隔时立即刷新，否则在间隔到达时刷新"""
+        with self.lock:
+            self.count += 1
+            self.file.write(self.format(self.count, cue, info or {}).encode('utf-8'))
+            remaining = self.flush_interval - (time.monotonic() - self.last_flush)
+            if remaining <= 0:
+                self._flush()
+            elif self.timer is None:
+                self.timer = threading.Timer(remaining, self.flush)
+                self.timer.daemon = True
+                self.timer.start()
+
+    def flush(self):
+        with self.lock:
+            if not self.file.closed:
+                self._flush()
+
+    def _flush(self):
+        """刷新到磁盘（调用方持有锁）"""
+        self.file.flush()
+        self.last_flush = time.monotonic()
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+
+    def state(self):
+        """已写入的位置和条数，用于检查点"""
+        with self.lock:
+            self._flush()
+            return {'offset': self.file.tell(), 'count': self.count}
+
+    def close(self):
+        """关闭文件，返回写入的字幕条数"""
+        with self.lock:
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+            if not self.file.closed:
+                self.file.close()
+        return self.count
+
+class SrtWriter(SubtitleWriter):
+    def format(self, index, cue, info):
+        start, end, text = cue
+        return f"{index}\n{format_timestamp(start)} --> {format_timestamp(end)}\n{text}\n\n"
+
+class VttWriter(SubtitleWriter):
+    def header(self):
+        return "WEBVTT\n\n"
+
+    def format(self, index, cue, info):
+        start, end, text = cue
+        return f"{format_timestamp(start, '.')} --> {format_timestamp(end, '.')}\n{text}\n\n"
+
+class JsonlWriter(SubtitleWriter):
+    """每行一个JSON对象，附带置信度和帧号"""
+
+    def format(self, index, cue, info):
+        start, end, text = cue
+        return json.dumps({
+            'index': index,
+            'start': round(start, 3),
+            'end': round(end, 3),
+            'text': text,
+            'confidence': info.get('confidence'),
+            'start_frame': info.get('start_frame'),
+            'end_frame': info.get('end_frame')
+        }, ensure_ascii=False) + "\n"
+
+# 按输出文件扩展名选择格式，未知扩展名使用SRT
+WRITERS = {
+    '.srt': SrtWriter,
+    '.vtt': VttWriter,
+    '.jsonl': JsonlWriter
+}
+
+def open_writer(path, flush_interval=1.0, resume=None):
+    """根据扩展名创建字幕写入器"""
+    writer_class = WRITERS.get(os.path.splitext(path)[1].lower(), SrtWriter)
+    return writer_class(path, flush_interval, resume)
+
+def save_cues(cues, output_path):
+    """将全部字幕条目一次写入文件（分段处理合并后使用）"""
+    if not cues:
+        print("未提取到任何字幕！")
+        return
+
+    print(f"提取到 {len(cues)} 条字幕，正在保存...")
+    try:
+        print(f"准备保存字幕到: {output_path}")
+        writer = open_writer(output_path)
+        for cue in cues:
+            writer.write(cue)
+        writer.close()
+        print(f"文件创建成功，大小: {os.path.getsize(output_path)} 字节")
+    except Exception as e:
+        print(f"存字幕文件时出错: {str(e)}")
+
+def load_cues(path):
+    """读取字幕文件中的字幕条目，支持 SRT / WebVTT / JSONL"""
+    with open(path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    if os.path.splitext(path)[1].lower() == '.jsonl':
+        return [
+            (item['start'], item['end'], item['text'])
+            for item in (json.loads(line) for line in content.splitlines() if line.strip())
+        ]
+
+    cues = []
+    for block in content.strip().split('\n\n'):
+        lines = block.strip().split('\n')
+        # 跳过序号或 WebVTT 的 cue 标识行
+        while lines and ' --> ' not in lines[0]:
+            lines = lines[1:]
+        if len(lines) < 2:
+            continue
+        start, end = (parse_timestamp(value) for value in lines[0].split(' --> '))
+        cues.append((start, end, '\n'.join(lines[1:])))
+    return cues
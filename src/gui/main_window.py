@@ -2,88 +2,97 @@ from PyQt5.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
                             QPushButton, QLabel, QListWidget, QTextEdit, 
                             QFileDialog, QMessageBox, QProgressBar)
 from PyQt5.QtCore import QThread, pyqtSignal
-from src.core.video import VideoProcessor
-from src.core.extractor import SubtitleExtractor
+from src.core.checkpoint import checkpoint_path
+from src.core.pool import ExtractorPool, default_worker_count
 from src.utils.logger import Logger
 import os
 
-class VideoProcessThread(QThread):
-    progress_updated = pyqtSignal(str)
-    progress_value = pyqtSignal(int)
-    video_progress = pyqtSignal(int, int)  # (视频索引, 进度值)
-    finished = pyqtSignal()
+# 自动检测的置信度低于该值时改为手动框选
+AUTO_AREA_CONFIDENCE = 0.5
+
+def unique_output_path(video_path):
+    """输出到视频所在目录的 output 子目录，文件已存在时追加序号，有未完成的检查点时沿用原文件"""
+    base_name = os.path.splitext(os.path.basename(video_path))[0]
+    output_dir = os.path.join(os.path.dirname(video_path), 'output')
+    os.makedirs(output_dir, exist_ok=True)
+    
+    counter = 1
+    output_path = os.path.join(output_dir, f"{base_name}.srt")
+    while os.path.exists(output_path):
+        # 上次处理被中断，继续写入同一个文件
+        if os.path.exists(checkpoint_path(output_path)):
+            return output_path
+        output_path = os.path.join(output_dir, f"{base_name}_{counter}.srt")
+        counter += 1
+    return output_path
+
+class EngineLoader(QThread):
+    """后台启动进程池，各进程加载OCR引擎，窗口不必等待模型加载"""
+    ready = pyqtSignal(int)  # 就绪的进程数
+    failed = pyqtSignal(str)
     
-    def __init__(self, extractor, video_path, subtitle_area, video_index):
+    def __init__(self, workers=None):
         super().__init__()
-        self.extractor = extractor
-        self.video_path = video_path
-        self.subtitle_area = subtitle_area
-        self.video_index = video_index
-        self.is_running = True
+        self.pool = ExtractorPool(workers or default_worker_count())
         
     def run(self):
         try:
-            if not self.is_running:
-                return
-                
-            base_name = os.path.splitext(os.path.basename(self.video_path))[0]
-            video_name = os.path.basename(self.video_path)
+            self.pool.start()
+            ready = 0
+            failed = 0
+            while ready + failed < self.pool.workers:
+                if self.isInterruptionRequested():
+                    return
+                message = self.pool.get_message(timeout=0.5)
+                if message is None:
+                    if not self.pool.is_alive():
+                        break
+                    continue
+                if message[0] == 'ready':
+                    ready += 1
+                elif message[0] == 'error':
+                    failed += 1
             
-            video_dir = os.path.dirname(self.video_path)
-            output_dir = os.path.join(video_dir, 'output')
-            os.makedirs(output_dir, exist_ok=True)
-            
-            counter = 1
-            output_file = f"{base_name}.srt"
-            output_path = os.path.join(output_dir, output_file)
-            
-            while os.path.exists(output_path):
-                output_file = f"{base_name}_{counter}.srt"
-                output_path = os.path.join(output_dir, output_file)
-                counter += 1
-            
-            def progress_callback(frame_progress):
-                if not self.is_running:
-                    raise InterruptedError("处理被用户中断")
-                if frame_progress == 0:
-                    frame_progress = 0.01
-                progress = int(frame_progress * 100)
-                self.video_progress.emit(self.video_index, progress)
-                self.progress_updated.emit(f"视频 {self.video_index + 1} 处理进度: {progress}%")
-            
-            if self.is_running:
-                self.extractor.extract_subtitles(
-                    self.video_path,
-                    output_path,
-                    'ch',
-                    self.subtitle_area,
-                    callback=progress_callback
-                )
-                self.progress_updated.emit(f"  √ {video_name} 处理完成，保存为: {output_file}")
-            
-        except InterruptedError as e:
-            self.progress_updated.emit(f"  × {video_name} 处理被中断: {str(e)}")
+            if ready:
+                self.ready.emit(ready)
+            else:
+                self.failed.emit("OCR引擎加载失败")
         except Exception as e:
-            self.progress_updated.emit(f"  × {video_name} 处理失败: {str(e)}")
-        finally:
-            self.finished.emit()
-            
-    def stop(self):
-        self.is_running = False
-        self.quit()
+            self.failed.emit(f"OCR引擎加载失败: {str(e)}")
+
+class AreaDetectThread(QThread):
+    """后台自动检测各视频的字幕区域"""
+    detected = pyqtSignal(str, object, float)  # 视频路径, 区域（未检测到时为 None）, 置信度
+
+    def __init__(self, video_files):
+        super().__init__()
+        self.video_files = list(video_files)
+
+    def run(self):
+        from src.core.area_detector import SubtitleAreaDetector
+        detector = SubtitleAreaDetector()
+        for video_path in self.video_files:
+            if self.isInterruptionRequested():
+                return
+            try:
+                area, confidence = detector.detect(video_path)
+            except Exception as e:
+                print(f"自动检测字幕区域失败: {str(e)}")
+                area, confidence = None, 0.0
+            self.detected.emit(video_path, area, confidence)
 
 class ProcessThread(QThread):
     progress_updated = pyqtSignal(str)
     progress_value = pyqtSignal(int)
     finished = pyqtSignal()
     
-    def __init__(self, extractor, video_files, subtitle_areas):
+    def __init__(self, video_files, subtitle_areas, pool):
         super().__init__()
-        self.extractor = extractor
         self.video_files = video_files
         self.subtitle_areas = subtitle_areas
+        # 已加载好OCR引擎的常驻进程池，由主窗口持有
+        self.pool = pool
         self.is_running = True
-        self.threads = []
         self.video_progresses = {}
         
     def calculate_total_progress(self):
@@ -100,94 +109,158 @@ class ProcessThread(QThread):
     
     def run(self):
         if not self.video_files or not self.subtitle_areas:
+            self.finished.emit()
             return
-            
+        
+        tasks = [path for path in self.video_files if path in self.subtitle_areas]
         total_videos = len(self.video_files)
+        output_paths = {}
         processed = 0
-        group_size = 5
-        output_paths = []
+        pool = self.pool
         
         try:
-            video_groups = [self.video_files[i:i + group_size] 
-                           for i in range(0, len(self.video_files), group_size)]
+            if len(tasks) == 1 and pool.workers > 1:
+                # 只有一个视频时按时间分段，多个进程同时处理同一个视频
+                self.run_sharded(tasks[0])
+                return
+            
+            # 每个进程已加载好自己的OCR引擎，视频从队列中依次领取
+            self.progress_updated.emit(f"\n========== 使用 {pool.workers} 个处理进程 ==========")
             
-            current_video_index = 0
-            for group_idx, group in enumerate(video_groups, 1):
-                if not self.is_running:
-                    raise InterruptedError("处理被用户中断")
-                    
-                self.progress_updated.emit(f"\n========== 开始处理第 {group_idx} 组视频 ==========")
+            for video_index, video_path in enumerate(tasks):
+                output_paths[video_index] = unique_output_path(video_path)
+                pool.submit(
+                    video_index,
+                    video_path,
+                    output_paths[video_index],
+                    self.subtitle_areas[video_path]
+                )
+            
+            remaining = len(tasks)
+            stop_sent = False
+            while remaining:
+                if not self.is_running and not stop_sent:
+                    pool.stop()
+                    stop_sent = True
                 
-                self.threads.clear()
-                for video_path in group:
-                    if not self.is_running:
-                        raise InterruptedError("处理被用户中断")
-                        
-                    if video_path not in self.subtitle_areas:
-                        continue
-                        
-                    base_name = os.path.splitext(os.path.basename(video_path))[0]
-                    video_dir = os.path.dirname(video_path)
-                    output_dir = os.path.join(video_dir, 'output')
-                    output_path = os.path.join(output_dir, f"{base_name}.srt")
-                    output_paths.append(output_path)
-                    
-                    thread = VideoProcessThread(
-                        self.extractor,
-                        video_path,
-                        self.subtitle_areas[video_path],
-                        current_video_index
-                    )
-                    thread.progress_updated.connect(self.progress_updated.emit)
-                    thread.video_progress.connect(self.update_video_progress)
-                    self.threads.append(thread)
-                    current_video_index += 1
+                message = pool.get_message(timeout=0.2)
+                if message is None:
+                    if not pool.is_alive():
+                        self.progress_updated.emit("\n处理进程已全部退出")
+                        break
+                    continue
                 
-                for thread in self.threads:
-                    if not self.is_running:
-                        raise InterruptedError("处理被用户中断")
-                    thread.start()
-                    
-                for thread in self.threads:
-                    if not self.is_running:
-                        raise InterruptedError("处理被用户中断")
-                    thread.wait()
-                    processed += 1
+                kind, video_index, payload = message
+                if kind == 'error':
+                    self.progress_updated.emit(f"  × {payload}")
+                    continue
+                if kind == 'ready':
+                    continue
                 
-                if self.is_running:
-                    self.progress_updated.emit(f"\n========== 第 {group_idx} 组处理完成 ==========")
-                    self.progress_updated.emit(f"成功处理: {len(self.threads)}/{len(group)} 个视频")
+                video_name = os.path.basename(tasks[video_index])
+                if kind == 'started':
+                    self.progress_updated.emit(f"视频 {video_index + 1} 开始处理: {video_name}")
+                elif kind == 'progress':
+                    progress = int(max(payload, 0.01) * 100)
+                    self.update_video_progress(video_index, progress)
+                    self.progress_updated.emit(f"视频 {video_index + 1} 处理进度: {progress}%")
+                elif kind == 'done':
+                    self.update_video_progress(video_index, 100)
+                    output_file = os.path.basename(output_paths[video_index])
+                    self.progress_updated.emit(f"  √ {video_name} 处理完成，保存为: {output_file}")
+                    processed += 1
+                    remaining -= 1
+                elif kind == 'interrupted':
+                    self.progress_updated.emit(f"  × {video_name} 处理被中断: {payload}")
+                    remaining -= 1
+                elif kind == 'failed':
+                    self.progress_updated.emit(f"  × {video_name} 处理失败: {payload}")
+                    remaining -= 1
             
             if self.is_running:
                 self.progress_updated.emit("\n=== 所有视频处理完成 ===")
                 self.progress_updated.emit(f"总共成功处理: {processed}/{total_videos} 个视频")
                 self.progress_updated.emit("\n字幕文件保存在以下位置：")
-                for path in output_paths:
+                for path in output_paths.values():
                     self.progress_updated.emit(path)
-                    
-        except InterruptedError as e:
-            self.progress_updated.emit(f"\n处理已中断: {str(e)}")
+            else:
+                self.progress_updated.emit("\n处理已中断: 处理被用户中断")
+                
+        except Exception as e:
+            self.progress_updated.emit(f"\n处理失败: {str(e)}")
         finally:
+            # 排队的任务都已结束，进程池留给下一次处理
+            pool.reset()
             self.finished.emit()
 
+    def run_sharded(self, video_path):
+        from src.core.sharding import extract_sharded
+        
+        workers = self.pool.workers
+        video_name = os.path.basename(video_path)
+        output_path = unique_output_path(video_path)
+        
+        def progress_callback(frame_progress):
+            if not self.is_running:
+                raise InterruptedError("处理被用户中断")
+            self.update_video_progress(0, int(max(frame_progress, 0.01) * 100))
+        
+        self.progress_updated.emit(f"\n========== 分 {workers} 段并行处理: {video_name} ==========")
+        try:
+            extract_sharded(
+                video_path,
+                output_path,
+                self.subtitle_areas[video_path],
+                shards=workers,
+                callback=progress_callback,
+                pool=self.pool
+            )
+            self.progress_updated.emit(f"  √ {video_name} 处理完成，保存为: {os.path.basename(output_path)}")
+            self.progress_updated.emit("\n=== 所有视频处理完成 ===")
+            self.progress_updated.emit(f"\n字幕文件保存在: {output_path}")
+        except InterruptedError as e:
+            self.progress_updated.emit(f"  × {video_name} 处理被中断: {str(e)}")
+        except Exception as e:
+            self.progress_updated.emit(f"  × {video_name} 处理失败: {str(e)}")
+
     def stop(self):
         self.is_running = False
-        for thread in self.threads:
-            thread.stop()
-            thread.wait()
-        self.quit()
 
 class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
-        self.video_processor = VideoProcessor()
-        self.extractor = SubtitleExtractor()
+        self.video_processor = None
         self.logger = Logger()
         self.video_files = []
         self.subtitle_areas = {}
         self.process_thread = None
+        self.pool = None
         self.current_video_number = 1
+        self.area_thread = None
+        # 正在自动检测或手动框选字幕区域
+        self.detecting = False
+        # 自动检测置信度不足、需要手动框选的视频
+        self.manual_videos = []
         self.initUI()
+        self.load_engine()
+        
+    def load_engine(self):
+        """后台加载OCR引擎，加载完成前“开始处理”按钮保持禁用"""
+        self.update_log("正在后台加载OCR引擎...")
+        self.engine_loader = EngineLoader()
+        self.engine_loader.ready.connect(self.on_engine_ready)
+        self.engine_loader.failed.connect(self.on_engine_failed)
+        self.engine_loader.start()
+        
+    def on_engine_ready(self, workers):
+        self.pool = self.engine_loader.pool
+        self.update_log(f"OCR引擎加载完成，{workers} 个处理进程就绪")
+        # 字幕区域还在检测或框选中时，由 on_detection_finished 启用按钮
+        self.start_btn.setEnabled(bool(self.subtitle_areas) and not self.detecting)
+        
+    def on_engine_failed(self, message):
+        self.update_log(message)
+        QMessageBox.critical(self, "错误", message)
         
     def initUI(self):
         self.setWindowTitle('字幕提取器')
@@ -223,7 +296,7 @@ class MainWindow(QMainWindow):
         button_layout = QHBoxLayout()
         
         self.open_btn = QPushButton('打开文件')
-        self.select_area_btn = QPushButton('框选区域')
+        self.select_area_btn = QPushButton('检测区域')
         self.start_btn = QPushButton('开始处理')
         self.stop_btn = QPushButton('停止处理')
 
@@ -342,31 +415,61 @@ class MainWindow(QMainWindow):
             self.start_btn.setEnabled(False)
 
     def select_area(self):
+        """先在后台自动检测所有视频的字幕区域，置信度不足的视频再逐个手动框选"""
         if not self.video_files:
             QMessageBox.warning(self, "警告", "请先选择视频文件")
             return
             
         self.subtitle_areas.clear()
+        self.manual_videos = []
         self.current_video_number = 1
-        total_videos = len(self.video_files)
-        
-        for i, video_path in enumerate(self.video_files, 1):
+        self.detecting = True
+        self.open_btn.setEnabled(False)
+        self.select_area_btn.setEnabled(False)
+        self.start_btn.setEnabled(False)
+        self.update_log(f"正在自动检测 {len(self.video_files)} 个视频的字幕区域...")
+
+        self.area_thread = AreaDetectThread(self.video_files)
+        self.area_thread.detected.connect(self.on_area_detected)
+        self.area_thread.finished.connect(self.on_detection_finished)
+        self.area_thread.start()
+
+    def on_area_detected(self, video_path, area, confidence):
+        file_name = os.path.basename(video_path)
+        if area and confidence >= AUTO_AREA_CONFIDENCE:
+            self.subtitle_areas[video_path] = area
+            self.update_log(f"  √ {file_name}: 字幕区域 {area[0]:.3f} - {area[1]:.3f}（置信度 {confidence:.2f}）")
+        else:
+            self.manual_videos.append(video_path)
+            self.update_log(f"  ? {file_name}: 未能可靠检测字幕区域（置信度 {confidence:.2f}），需要手动框选")
+        self.current_video_number += 1
+
+    def on_detection_finished(self):
+        total_videos = len(self.manual_videos)
+        for i, video_path in enumerate(self.manual_videos, 1):
             file_name = os.path.basename(video_path)
             self.update_log(f"{i}、请框选第 {i}/{total_videos} 个视频的字幕区域: {file_name}")
             
-            area = self.video_processor.select_subtitle_area(video_path)
+            area = self.get_video_processor().select_subtitle_area(video_path)
             if area:
                 self.subtitle_areas[video_path] = area
-            self.current_video_number += 1
 
-        if self.subtitle_areas:
-            self.start_btn.setEnabled(True)
-        else:
-            self.start_btn.setEnabled(False)
+        self.detecting = False
+        self.open_btn.setEnabled(True)
+        self.select_area_btn.setEnabled(True)
+        # OCR引擎加载完成后才能开始处理
+        self.start_btn.setEnabled(bool(self.subtitle_areas) and self.pool is not None)
+        
+    def get_video_processor(self):
+        """首次框选时才导入 OpenCV"""
+        if self.video_processor is None:
+            from src.core.video import VideoProcessor
+            self.video_processor = VideoProcessor()
+        return self.video_processor
 
     def start_process(self):
         if not self.subtitle_areas:
-            QMessageBox.warning(self, "警告", "请先框选字幕区域")
+            QMessageBox.warning(self, "警告", "请先检测或框选字幕区域")
             return
         
         self.progress_bar.setValue(0)
@@ -379,9 +482,9 @@ class MainWindow(QMainWindow):
         self.stop_btn.setEnabled(True)
         
         self.process_thread = ProcessThread(
-            self.extractor,
             self.video_files,
-            self.subtitle_areas
+            self.subtitle_areas,
+            self.pool
         )
         
         self.process_thread.progress_updated.connect(self.update_log)
@@ -407,7 +510,7 @@ class MainWindow(QMainWindow):
     def on_process_finished(self):
         self.open_btn.setEnabled(True)
         self.select_area_btn.setEnabled(True)
-        self.start_btn.setEnabled(True)
+        self.start_btn.setEnabled(self.pool is not None)
         self.stop_btn.setEnabled(False)
         self.reset_progress()
 
@@ -424,7 +527,12 @@ class MainWindow(QMainWindow):
         if self.process_thread and self.process_thread.isRunning():
             self.process_thread.stop()
             self.process_thread.wait()
-        self.video_processor.close()
+        # 先关闭进程池，正在加载模型的进程会被终止，加载线程随之退出
+        self.engine_loader.requestInterruption()
+        self.engine_loader.pool.close()
+        self.engine_loader.wait()
+        if self.video_processor:
+            self.video_processor.close()
         event.accept()
 
 if __name__ == '__main__':
@@ -35,4 +35,17 @@ class Logger:
         self.logger.error(message)
         
     def warning(self, message):
-        self.logger.warning(message)
\ No newline at end of file
+        self.logger.warning(message)
+
+# 逐帧的详细输出（字幕区域、识别文本、处理进度）只在调试级别打印，
+# 设置环境变量 SUBTITLE_DEBUG=1 或调用 set_debug(True) 开启
+_debug_enabled = os.environ.get('SUBTITLE_DEBUG', '') not in ('', '0')
+
+def set_debug(enabled):
+    global _debug_enabled
+    _debug_enabled = bool(enabled)
+
+def debug(message):
+    """调试级别输出"""
+    if _debug_enabled:
+        print(message)
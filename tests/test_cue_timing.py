@@ -0,0 +1,58 @@
+"""字幕结束时间：识别为空的帧与判断为空白的帧一样结束当前字幕
+
+    python -m pytest tests
+"""
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+# 将项目根目录添加到 Python 路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from benchmark.fake_ocr import CodebookOCR
+from benchmark.synthetic import SUBTITLE_AREA, make_cues, make_video
+from src.core.extractor import SubtitleExtractor
+
+class BlankFrameTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.workdir = tempfile.mkdtemp(prefix='subtitle_timing_')
+        cls.video_path = os.path.join(cls.workdir, 'video.avi')
+        cls.duration = 8
+        cls.truth = make_cues(cls.duration, 25)
+        make_video(cls.video_path, cls.truth, cls.duration, 640, 360, 25)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.workdir, ignore_errors=True)
+
+    def extract(self, **options):
+        extractor = SubtitleExtractor(ocr_engine=CodebookOCR(), ocr_cache=False, checkpoint_interval=None,
+                                      **options)
+        self.addCleanup(extractor.close)
+        return extractor.extract_cues(self.video_path, SUBTITLE_AREA), extractor.stats
+
+    def test_blank_frame_before_calibration_ends_cue(self):
+        # 短视频中OCR次数不足以完成空白过滤的校准，字幕消失的帧经过OCR得到空文本
+        cues, stats = self.extract()
+        self.assertEqual(stats['ocr_blank'], 0)
+        self.assertEqual(len(cues), len(self.truth))
+        start, end, _ = cues[0]
+        truth_start, truth_end, _ = self.truth[0]
+        self.assertAlmostEqual(start, truth_start, delta=0.1)
+        self.assertAlmostEqual(end, truth_end, delta=0.1)
+
+    def test_sampling_modes_agree(self):
+        uniform, _ = self.extract(blank_filter=False)
+        adaptive, _ = self.extract(blank_filter=False, sampling='adaptive')
+        self.assertEqual(len(uniform), len(adaptive))
+        for (start, end, _), (adaptive_start, adaptive_end, _) in zip(uniform, adaptive):
+            self.assertAlmostEqual(start, adaptive_start, delta=0.1)
+            self.assertAlmostEqual(end, adaptive_end, delta=0.1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+"""网络视频边下载边提取：用本地 HTTP 服务提供合成视频，不需要模型和外部网络
+
+    python -m pytest tests
+"""
+import functools
+import http.server
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+
+# 将项目根目录添加到 Python 路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from benchmark.fake_ocr import CodebookOCR
+from benchmark.synthetic import SUBTITLE_AREA, make_cues, make_video
+from src.core.extractor import SubtitleExtractor
+from src.core.ffmpeg_source import ffmpeg_available
+from src.core.writers import load_cues
+
+class VideoHandler(http.server.BaseHTTPRequestHandler):
+    """提供一个视频文件；truncate 为 True 时声明完整长度，只发送一半数据后断开连接"""
+
+    def __init__(self, *args, path=None, truncate=False, **kwargs):
+        self.path_on_disk = path
+        self.truncate = truncate
+        super().__init__(*args, **kwargs)
+
+    def do_GET(self):
+        with open(self.path_on_disk, 'rb') as f:
+            data = f.read()
+        self.send_response(200)
+        self.send_header('Content-Type', 'video/x-msvideo')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data[:len(data) // 2] if self.truncate else data)
+        self.wfile.flush()
+        self.close_connection = True
+
+    def log_message(self, format, *args):
+        pass
+
+@unittest.skipUnless(ffmpeg_available(), "需要 ffmpeg")
+class IngestTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.workdir = tempfile.mkdtemp(prefix='subtitle_ingest_')
+        cls.video_path = os.path.join(cls.workdir, 'video.avi')
+        cls.duration = 8
+        cls.truth = make_cues(cls.duration, 25)
+        make_video(cls.video_path, cls.truth, cls.duration, 640, 360, 25)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.workdir, ignore_errors=True)
+
+    def serve(self, truncate=False):
+        """启动本地 HTTP 服务，返回视频地址"""
+        handler = functools.partial(VideoHandler, path=self.video_path, truncate=truncate)
+        server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return f"http://127.0.0.1:{server.server_address[1]}/video.avi"
+
+    def extract(self, url, **kwargs):
+        extractor = SubtitleExtractor(ocr_engine=CodebookOCR(), ocr_cache=False)
+        self.addCleanup(extractor.close)
+        output_path = os.path.join(self.workdir, f"{len(os.listdir(self.workdir))}.srt")
+        stats = extractor.extract_subtitles(url, output_path, 'ch', SUBTITLE_AREA, **kwargs)
+        return stats, output_path
+
+    def test_stream_matches_local_file(self):
+        saved_path = os.path.join(self.workdir, 'saved.avi')
+        stats, output_path = self.extract(self.serve(), save_stream_to=saved_path)
+        self.assertNotIn('error', stats)
+        cues = load_cues(output_path)
+        self.assertEqual(len(cues), len(self.truth))
+        for (start, end, _), (truth_start, truth_end, _) in zip(cues, self.truth):
+            self.assertAlmostEqual(start, truth_start, delta=0.15)
+        # 同时保存的视频与原文件相同
+        with open(saved_path, 'rb') as saved, open(self.video_path, 'rb') as original:
+            self.assertEqual(saved.read(), original.read())
+
+    def test_truncated_download_reports_error(self):
+        stats, _ = self.extract(self.serve(truncate=True))
+        self.assertIn('error', stats)
+        self.assertIn("下载", stats['error'])
+
+if __name__ == '__main__':
+    unittest.main()